@@ -0,0 +1,243 @@
+# availability_history.py
+"""
+Append-only, delta-encoded history of YouBike availability.
+
+Layout of a store directory:
+  stations.txt  station catalog, one sno per line (line number = station id)
+  log.bin       framed records; each holds only the stations whose
+                available_rent_bikes / available_return_bikes changed since
+                the previous poll, as zlib-compressed columns
+                [id deltas int32][rent int16][return int16]
+  index.bin     one fixed-size entry per record (timestamp, offset, kind)
+
+Every keyframe_interval polls a keyframe with the full state is written so
+"state at time t" only replays the records since the last keyframe.
+"""
+import argparse
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+_RECORD = struct.Struct('<4sdBII')  # magic, timestamp, kind, row count, payload bytes
+_MAGIC = b'YBH1'
+_INDEX_DTYPE = np.dtype([('timestamp', '<f8'), ('offset', '<u8'), ('kind', 'u1')])
+DELTA, KEYFRAME = 0, 1
+UNKNOWN = -1
+
+
+class AvailabilityHistory:
+    """Writes and queries an availability history store at 'path'."""
+
+    def __init__(self, path, keyframe_interval=360):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        os.makedirs(path, exist_ok=True)
+        self._catalog_path = os.path.join(path, 'stations.txt')
+        self._log_path = os.path.join(path, 'log.bin')
+        self._index_path = os.path.join(path, 'index.bin')
+
+        self.snos = []
+        if os.path.exists(self._catalog_path):
+            with open(self._catalog_path, encoding='utf-8') as f:
+                self.snos = [line.strip() for line in f if line.strip()]
+        self._ids = {sno: i for i, sno in enumerate(self.snos)}
+
+        self._index = self._load_index()
+        if len(self._index):
+            _, self._rent, self._ret = self.state_at(self._index['timestamp'][-1])
+        else:
+            self._rent = np.full(len(self.snos), UNKNOWN, dtype=np.int16)
+            self._ret = np.full(len(self.snos), UNKNOWN, dtype=np.int16)
+
+    def __len__(self):
+        return len(self._index)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def append(self, timestamp, snos, rent, ret):
+        """
+        Records one poll. Only stations whose values changed are written,
+        except on keyframes. Returns the number of rows written.
+        """
+        if len(self._index) and timestamp < self._index['timestamp'][-1]:
+            raise ValueError("History timestamps must be non-decreasing.")
+
+        ids = self._station_ids(snos)
+        new_rent, new_ret = self._rent.copy(), self._ret.copy()
+        new_rent[ids] = np.asarray(rent, dtype=np.int16)
+        new_ret[ids] = np.asarray(ret, dtype=np.int16)
+
+        if len(self._index) % self.keyframe_interval == 0:
+            kind, changed = KEYFRAME, np.arange(len(self.snos))
+        else:
+            kind, changed = DELTA, np.flatnonzero((new_rent != self._rent) | (new_ret != self._ret))
+
+        self._write_record(timestamp, kind, changed, new_rent[changed], new_ret[changed])
+        self._rent, self._ret = new_rent, new_ret
+        return len(changed)
+
+    def append_snapshot(self, youbike_df, timestamp=None):
+        """Records a snapshot DataFrame with sno / available_rent_bikes / available_return_bikes columns."""
+        return self.append(
+            time.time() if timestamp is None else timestamp,
+            youbike_df['sno'].astype(str).to_numpy(),
+            youbike_df['available_rent_bikes'].to_numpy(),
+            youbike_df['available_return_bikes'].to_numpy(),
+        )
+
+    def append_api_data(self, api_data, timestamp=None):
+        """Records the raw JSON list returned by the YouBike v2 API."""
+        return self.append(
+            time.time() if timestamp is None else timestamp,
+            [str(s['sno']) for s in api_data],
+            [int(s.get('available_rent_bikes') or 0) for s in api_data],
+            [int(s.get('available_return_bikes') or 0) for s in api_data],
+        )
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def timestamps(self):
+        return self._index['timestamp'].copy()
+
+    def state_at(self, timestamp):
+        """
+        Reconstructs the availability of every catalog station at 'timestamp'.
+        Returns (snos, rent, ret); stations not yet seen hold UNKNOWN (-1).
+        """
+        rent = np.full(len(self.snos), UNKNOWN, dtype=np.int16)
+        ret = np.full(len(self.snos), UNKNOWN, dtype=np.int16)
+        last = int(np.searchsorted(self._index['timestamp'], timestamp, side='right')) - 1
+        if last < 0:
+            return list(self.snos), rent, ret
+
+        keyframes = np.flatnonzero(self._index['kind'][:last + 1] == KEYFRAME)
+        first = int(keyframes[-1]) if len(keyframes) else 0
+        with open(self._log_path, 'rb') as f:
+            for record in range(first, last + 1):
+                ids, rec_rent, rec_ret = self._read_record(f, record)
+                rent[ids] = rec_rent
+                ret[ids] = rec_ret
+        return list(self.snos), rent, ret
+
+    def iter_states(self, start=None, end=None):
+        """Yields (timestamp, rent, ret) after every poll in [start, end]; arrays are reused."""
+        if not len(self._index):
+            return
+        timestamps = self._index['timestamp']
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        last = len(timestamps) - 1 if end is None else int(np.searchsorted(timestamps, end, side='right')) - 1
+        if first > last:
+            return
+
+        _, rent, ret = self.state_at(timestamps[first])
+        yield float(timestamps[first]), rent, ret
+        with open(self._log_path, 'rb') as f:
+            for record in range(first + 1, last + 1):
+                ids, rec_rent, rec_ret = self._read_record(f, record)
+                rent[ids] = rec_rent
+                ret[ids] = rec_ret
+                yield float(timestamps[record]), rent, ret
+
+    def station_series(self, sno, start, end):
+        """
+        Returns (timestamps, rent, ret) arrays for one station over [start, end]:
+        its value at 'start' followed by every change inside the range.
+        """
+        station_id = self._ids.get(str(sno))
+        if station_id is None:
+            raise KeyError(f"Unknown station {sno}")
+
+        _, rent, ret = self.state_at(start)
+        series = [(start, rent[station_id], ret[station_id])]
+        timestamps = self._index['timestamp']
+        first = int(np.searchsorted(timestamps, start, side='right'))
+        last = int(np.searchsorted(timestamps, end, side='right')) - 1
+        with open(self._log_path, 'rb') as f:
+            for record in range(first, last + 1):
+                ids, rec_rent, rec_ret = self._read_record(f, record)
+                hit = np.searchsorted(ids, station_id)
+                if hit < len(ids) and ids[hit] == station_id:
+                    value = (rec_rent[hit], rec_ret[hit])
+                    if value != series[-1][1:]:
+                        series.append((float(timestamps[record]),) + value)
+
+        ts, rent_values, ret_values = zip(*series)
+        return np.array(ts), np.array(rent_values, dtype=np.int16), np.array(ret_values, dtype=np.int16)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _station_ids(self, snos):
+        new_snos = [str(sno) for sno in snos if str(sno) not in self._ids]
+        if new_snos:
+            new_snos = list(dict.fromkeys(new_snos))
+            with open(self._catalog_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(f"{sno}\n" for sno in new_snos))
+            for sno in new_snos:
+                self._ids[sno] = len(self.snos)
+                self.snos.append(sno)
+            padding = np.full(len(new_snos), UNKNOWN, dtype=np.int16)
+            self._rent = np.concatenate([self._rent, padding])
+            self._ret = np.concatenate([self._ret, padding])
+        return np.fromiter((self._ids[str(sno)] for sno in snos), dtype=np.int64, count=len(snos))
+
+    def _write_record(self, timestamp, kind, ids, rent, ret):
+        id_deltas = np.diff(ids, prepend=0).astype('<i4')
+        payload = zlib.compress(
+            id_deltas.tobytes() + rent.astype('<i2').tobytes() + ret.astype('<i2').tobytes()
+        )
+        with open(self._log_path, 'ab') as f:
+            offset = f.tell()
+            f.write(_RECORD.pack(_MAGIC, timestamp, kind, len(ids), len(payload)))
+            f.write(payload)
+        entry = np.array([(timestamp, offset, kind)], dtype=_INDEX_DTYPE)
+        with open(self._index_path, 'ab') as f:
+            f.write(entry.tobytes())
+        self._index = np.concatenate([self._index, entry])
+
+    def _read_record(self, f, record):
+        f.seek(int(self._index['offset'][record]))
+        magic, _, _, count, length = _RECORD.unpack(f.read(_RECORD.size))
+        if magic != _MAGIC:
+            raise ValueError(f"Corrupt history record {record} in {self._log_path}")
+        raw = zlib.decompress(f.read(length))
+        ids = np.cumsum(np.frombuffer(raw, dtype='<i4', count=count))
+        rent = np.frombuffer(raw, dtype='<i2', count=count, offset=4 * count)
+        ret = np.frombuffer(raw, dtype='<i2', count=count, offset=6 * count)
+        return ids, rent, ret
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            return np.zeros(0, dtype=_INDEX_DTYPE)
+        index = np.fromfile(self._index_path, dtype=_INDEX_DTYPE)
+        # Drop a torn trailing entry whose log record never made it to disk
+        log_size = os.path.getsize(self._log_path) if os.path.exists(self._log_path) else 0
+        return index[index['offset'] < log_size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record YouBike availability history')
+    parser.add_argument('--path', default='youbike_history', help='History store directory')
+    parser.add_argument('--interval', type=float, default=60, help='Polling interval in seconds')
+    args = parser.parse_args()
+
+    import services
+
+    history = AvailabilityHistory(args.path)
+    print(f"📼 Recording availability into {args.path} every {args.interval:.0f}s (Ctrl+C to stop)")
+    while True:
+        started = time.time()
+        api_data = services.fetch_youbike_data()
+        if isinstance(api_data, list):
+            written = history.append_api_data(api_data, started)
+            print(f"  -> {written} changed stations recorded ({len(history)} polls)")
+        time.sleep(max(0.0, args.interval - (time.time() - started)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# availability_predictor.py
+"""
+Time-of-day availability profiles learned offline from an AvailabilityHistory.
+
+For every station and time-of-day bin the model stores the mean number of
+rentable bikes and free docks. A prediction shifts the current value by the
+profile's change between now and the expected arrival time, so it keeps the
+live reading and only adds the typical drift. Inference is a pair of fancy
+indexing operations over all candidate stations at once.
+
+Train with:
+  python availability_predictor.py --history youbike_history --output availability_model.npz
+"""
+import argparse
+
+import numpy as np
+
+TAIPEI_UTC_OFFSET_S = 8 * 3600
+DEFAULT_BIN_MINUTES = 15
+
+
+class AvailabilityPredictor:
+    """Per-station, per-time-of-day availability profile."""
+
+    def __init__(self, snos, rent_profile, ret_profile, bin_minutes=DEFAULT_BIN_MINUTES):
+        self.snos = [str(sno) for sno in snos]
+        self.rent_profile = np.asarray(rent_profile, dtype=np.float32)
+        self.ret_profile = np.asarray(ret_profile, dtype=np.float32)
+        self.bin_minutes = bin_minutes
+        self._rows = {sno: row for row, sno in enumerate(self.snos)}
+
+    @property
+    def n_bins(self):
+        return self.rent_profile.shape[1]
+
+    @classmethod
+    def train(cls, history, start=None, end=None, bin_minutes=DEFAULT_BIN_MINUTES):
+        """Averages every recorded poll of the history store into time-of-day bins."""
+        n_stations, n_bins = len(history.snos), (24 * 60) // bin_minutes
+        rent_sum = np.zeros((n_stations, n_bins))
+        ret_sum = np.zeros((n_stations, n_bins))
+        counts = np.zeros((n_stations, n_bins))
+
+        for timestamp, rent, ret in history.iter_states(start, end):
+            time_bin = _time_bins(timestamp, bin_minutes)
+            known = np.flatnonzero(rent >= 0)
+            rent_sum[known, time_bin] += rent[known]
+            ret_sum[known, time_bin] += ret[known]
+            counts[known, time_bin] += 1
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rent_profile = rent_sum / counts
+            ret_profile = ret_sum / counts
+        # Bins without observations fall back to the station's overall mean (no drift)
+        for profile, total in ((rent_profile, rent_sum), (ret_profile, ret_sum)):
+            station_mean = total.sum(axis=1) / np.maximum(counts.sum(axis=1), 1)
+            missing = np.isnan(profile)
+            profile[missing] = np.broadcast_to(station_mean[:, None], profile.shape)[missing]
+
+        print(f"✅ Trained availability profiles for {n_stations} stations x {n_bins} bins")
+        return cls(history.snos, rent_profile, ret_profile, bin_minutes)
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            snos=np.array(self.snos),
+            rent_profile=self.rent_profile,
+            ret_profile=self.ret_profile,
+            bin_minutes=self.bin_minutes,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['snos'], data['rent_profile'], data['ret_profile'], int(data['bin_minutes']))
+
+    def rows_for(self, snos):
+        """Maps station IDs to model rows; stations the model has never seen get -1."""
+        return np.fromiter((self._rows.get(str(sno), -1) for sno in snos), dtype=np.int64, count=len(snos))
+
+    def predict(self, rows, current_rent, current_ret, now, arrival_minutes):
+        """
+        Expected (rent, ret) at now + arrival_minutes for every station in 'rows'.
+        'arrival_minutes' may be a scalar or an array aligned with 'rows'.
+        Stations unknown to the model keep their current values.
+        """
+        rows = np.asarray(rows)
+        rent = np.asarray(current_rent, dtype=np.float32).copy()
+        ret = np.asarray(current_ret, dtype=np.float32).copy()
+
+        known = rows >= 0
+        if known.any():
+            now_bin = _time_bins(now, self.bin_minutes)
+            arrival = now + np.broadcast_to(np.asarray(arrival_minutes, dtype=float), rows.shape)[known] * 60
+            arrival_bins = _time_bins(arrival, self.bin_minutes)
+            known_rows = rows[known]
+            rent[known] += self.rent_profile[known_rows, arrival_bins] - self.rent_profile[known_rows, now_bin]
+            ret[known] += self.ret_profile[known_rows, arrival_bins] - self.ret_profile[known_rows, now_bin]
+
+        return np.maximum(rent, 0), np.maximum(ret, 0)
+
+
+def _time_bins(timestamps, bin_minutes):
+    """Taipei local time-of-day bin for epoch timestamps."""
+    seconds_of_day = (np.asarray(timestamps, dtype=float) + TAIPEI_UTC_OFFSET_S) % 86400
+    return (seconds_of_day // (bin_minutes * 60)).astype(np.int64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the arrival-time availability predictor')
+    parser.add_argument('--history', default='youbike_history', help='AvailabilityHistory directory')
+    parser.add_argument('--output', default='availability_model.npz', help='Output model file')
+    parser.add_argument('--bin-minutes', type=int, default=DEFAULT_BIN_MINUTES)
+    args = parser.parse_args()
+
+    from availability_history import AvailabilityHistory
+
+    model = AvailabilityPredictor.train(AvailabilityHistory(args.history), bin_minutes=args.bin_minutes)
+    model.save(args.output)
+    print(f"💾 Saved model to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
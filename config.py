@@ -4,17 +4,31 @@
 USER_LAT = 25.0479
 USER_LON = 121.5171
 
-# 2. Routing Rules
+# 2. Bounding box (min_lat, max_lat, min_lon, max_lon) of attractions worth loading
+TAIPEI_BBOX = (24.90, 25.30, 121.40, 121.70)
+
+# 3. Routing Rules
 AVG_BIKE_SPEED_KMH = 10  # Average speed for a YouBike ride
 MAX_BIKE_TIME_MINS = 20  # Maximum allowed travel time from a station to an attraction
 
-# 3. Geographic shapes for the letters "TAIPEI" over the city
+# 4. Geographic shapes for the letters "TAIPEI" over the city
 # These are carefully chosen coordinates that form the letters on a map.
 LETTER_SHAPES = {
     'T': [((25.05, 121.50), (25.05, 121.53)), ((25.05, 121.515), (25.03, 121.515))],
     'A': [((25.03, 121.53), (25.05, 121.54)), ((25.05, 121.54), (25.03, 121.55)), ((25.04, 121.535), (25.04, 121.545))],
     'I': [((25.03, 121.56), (25.05, 121.56))],
     'P': [((25.03, 121.57), (25.05, 121.57)), ((25.05, 121.57), (25.04, 121.58)), ((25.04, 121.58), (25.04, 121.57))],
-    'E': [((25.05, 121.60), (25.03, 121.60)), ((25.05, 121.60), (25.05, 121.59)), ((25.04, 121.60), (25.04, 121.59)), ((25.03, 121.60), (25.03, 121.59))],
-    'I': [((25.03, 121.61), (25.05, 121.61))]
-}
\ No newline at end of file
+    'E': [((25.05, 121.60), (25.03, 121.60)), ((25.05, 121.60), (25.05, 121.59)), ((25.04, 121.60), (25.04, 121.59)), ((25.03, 121.60), (25.03, 121.59))]
+}
+
+# 5. Word layout: letters are drawn left to right, each shifted so that its west
+#    edge starts LETTER_SPACING_DEG east of the previous letter's east edge.
+WORD_ORIGIN_LON = 121.50
+LETTER_SPACING_DEG = 0.01
+# 6. OSRM calibration (see distance_estimator.py). Leg logging is off unless a
+#    path is set; the log stops growing once it reaches the size limit.
+#    Calibrated per-band speeds come from OSRM's own timings (the public server
+#    answers with car timings), so they are only used when explicitly enabled.
+OSRM_LEG_LOG_PATH = None  # e.g. 'osrm_legs.jsonl'
+OSRM_LEG_LOG_MAX_BYTES = 50 * 2**20
+USE_CALIBRATED_SPEED = False
@@ -1,4 +1,7 @@
 # data_loader.py
+import os
+import pickle
+
 import pandas as pd
 
 def load_youbike_data_from_api(api_data):
@@ -36,17 +39,84 @@ def load_youbike_data_from_api(api_data):
     return df
 
 
-def load_attractions(csv_path):
+ATTRACTION_TEXT_COLUMNS = ['name', 'name_zh', 'address']
+ATTRACTION_COORD_COLUMNS = ['nlat', 'elong']
+
+
+def load_attractions(csv_path, bbox=None, chunksize=5000, use_cache=True, missing_ok=True):
     """
     Loads Taipei attractions data from a CSV file.
-    (This function remains the same)
+    Only the columns the planners use are read: coordinates as float32 and the
+    text columns as categoricals. The file is streamed in chunks and rows
+    outside bbox (min_lat, max_lat, min_lon, max_lon) are dropped as they arrive.
+    The parsed frame is cached next to the CSV and reused while the CSV's
+    mtime and size are unchanged.
+    A missing file returns an empty frame, or raises FileNotFoundError when
+    missing_ok is False.
     """
+    cache_path = f"{csv_path}.cache.pkl"
     try:
-        df = pd.read_csv(csv_path)
-        df['nlat'] = pd.to_numeric(df['nlat'], errors='coerce')
-        df['elong'] = pd.to_numeric(df['elong'], errors='coerce')
-        df.dropna(subset=['nlat', 'elong'], inplace=True)
-        return df
+        stat = os.stat(csv_path)
     except FileNotFoundError:
+        if not missing_ok:
+            raise
         print(f"Error: The file at {csv_path} was not found.")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
+
+    signature = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'bbox': tuple(bbox) if bbox else None}
+    if use_cache and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached['signature'] == signature:
+                return cached['df']
+        except (OSError, pickle.UnpicklingError, KeyError, EOFError):
+            pass
+
+    wanted = set(ATTRACTION_TEXT_COLUMNS + ATTRACTION_COORD_COLUMNS)
+    try:
+        chunks = _filter_chunks(_read_typed_chunks(csv_path, wanted, chunksize), bbox)
+    except ValueError:
+        # A coordinate cell is not numeric; re-read coercing coordinates per chunk
+        chunks = _filter_chunks(_read_coerced_chunks(csv_path, wanted, chunksize), bbox)
+
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=sorted(wanted))
+    for col in ATTRACTION_TEXT_COLUMNS:
+        if col not in df.columns:
+            df[col] = pd.NA
+        df[col] = df[col].astype('category')
+    df = df[ATTRACTION_TEXT_COLUMNS + ATTRACTION_COORD_COLUMNS]
+
+    if use_cache:
+        try:
+            with open(cache_path, 'wb') as f:
+                pickle.dump({'signature': signature, 'df': df}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print(f"Could not write attractions cache {cache_path}: {e}")
+    return df
+
+
+def _read_typed_chunks(csv_path, wanted, chunksize):
+    dtypes = {col: 'object' for col in ATTRACTION_TEXT_COLUMNS}
+    dtypes.update({col: 'float32' for col in ATTRACTION_COORD_COLUMNS})
+    return pd.read_csv(csv_path, usecols=lambda col: col in wanted, dtype=dtypes, chunksize=chunksize)
+
+
+def _read_coerced_chunks(csv_path, wanted, chunksize):
+    dtypes = {col: 'object' for col in ATTRACTION_TEXT_COLUMNS}
+    for chunk in pd.read_csv(csv_path, usecols=lambda col: col in wanted, dtype=dtypes, chunksize=chunksize):
+        for col in ATTRACTION_COORD_COLUMNS:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype('float32')
+        yield chunk
+
+
+def _filter_chunks(chunks, bbox):
+    """Drops rows without coordinates or outside bbox from each chunk as it is read."""
+    kept = []
+    for chunk in chunks:
+        chunk = chunk.dropna(subset=ATTRACTION_COORD_COLUMNS)
+        if bbox:
+            min_lat, max_lat, min_lon, max_lon = bbox
+            chunk = chunk[chunk['nlat'].between(min_lat, max_lat) & chunk['elong'].between(min_lon, max_lon)]
+        kept.append(chunk)
+    return kept
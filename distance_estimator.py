@@ -0,0 +1,227 @@
+# distance_estimator.py
+"""
+No-network road distance and duration estimates calibrated from OSRM.
+
+When config.OSRM_LEG_LOG_PATH is set, every successful OSRM response is
+logged leg by leg to that file (up to config.OSRM_LEG_LOG_MAX_BYTES). Running
+  python distance_estimator.py --legs osrm_legs.jsonl --output distance_table.json
+turns that log into a small lookup table:
+  - detour factor (road km / straight-line km) per area cell and distance band
+  - riding speed per distance band
+Durations are road km divided by the caller's configured riding speed; the
+calibrated band speeds are only used with config.USE_CALIBRATED_SPEED, since
+OSRM's timings need not match the profile that was requested.
+An estimate is one haversine plus two dictionary lookups; estimate_array() looks
+the factors up in a dense (cell, band) array instead. Without a table the
+estimator degrades to straight-line distance, which is what the planners used
+before calibration data existed.
+"""
+import argparse
+import bisect
+import json
+import math
+import os
+from collections import defaultdict
+
+import numpy as np
+
+import config
+import utils
+
+LEG_LOG_PATH = 'osrm_legs.jsonl'
+DISTANCE_TABLE_PATH = 'distance_table.json'
+
+DISTANCE_BANDS_KM = [0.5, 1.0, 2.0, 4.0]  # upper edges; the last band is open-ended
+AREA_CELL_DEG = 0.02
+MIN_SAMPLES = 3
+DEFAULT_DETOUR = 1.0
+DEFAULT_SPEED_KMH = 10.0
+
+
+def record_osrm_legs(points, legs, path=None, max_bytes=None):
+    """
+    Appends the legs of a successful OSRM response to the calibration log at
+    'path' (config.OSRM_LEG_LOG_PATH by default; nothing is logged when unset).
+    'points' are (lat, lon) pairs in request order; 'legs' is route['legs'].
+    """
+    path = path or config.OSRM_LEG_LOG_PATH
+    max_bytes = config.OSRM_LEG_LOG_MAX_BYTES if max_bytes is None else max_bytes
+    if not path:
+        return
+    try:
+        if os.path.exists(path) and os.path.getsize(path) >= max_bytes:
+            return
+        with open(path, 'a', encoding='utf-8') as f:
+            for (lat1, lon1), (lat2, lon2), leg in zip(points, points[1:], legs):
+                f.write(json.dumps({
+                    'lat1': lat1, 'lon1': lon1, 'lat2': lat2, 'lon2': lon2,
+                    'distance_km': leg['distance'] / 1000,
+                    'duration_min': leg['duration'] / 60,
+                }) + "\n")
+    except OSError as e:
+        print(f"  -> Could not record OSRM legs: {e}")
+
+
+class DistanceEstimator:
+    """Lookup-table estimator for road distance (km) and riding time (minutes)."""
+
+    def __init__(self, detour=None, band_detour=None, band_speed=None, use_calibrated_speed=False):
+        self.detour = detour or {}             # "cell_lat,cell_lon,band" -> factor
+        self.band_detour = band_detour or {}   # band -> factor
+        self.band_speed = band_speed or {}     # band -> km/h
+        self.use_calibrated_speed = use_calibrated_speed
+        self._band_factors = np.array([self.band_detour.get(b, DEFAULT_DETOUR) for b in range(len(DISTANCE_BANDS_KM) + 1)])
+        self._cell_origin, self._cell_factors = _dense_cells(self.detour)
+
+    @property
+    def calibrated(self):
+        return bool(self.band_detour)
+
+    @classmethod
+    def calibrate(cls, leg_log_path=LEG_LOG_PATH):
+        """Builds the table from logged OSRM legs, using medians per bucket."""
+        by_cell, by_band, speeds = defaultdict(list), defaultdict(list), defaultdict(list)
+        with open(leg_log_path, encoding='utf-8') as f:
+            for line in f:
+                leg = json.loads(line)
+                straight = utils.haversine_distance(leg['lat1'], leg['lon1'], leg['lat2'], leg['lon2'])
+                if straight < 0.05 or leg['duration_min'] <= 0:
+                    continue
+                band = _band(straight)
+                factor = leg['distance_km'] / straight
+                by_cell[_cell_key(leg['lat1'], leg['lon1'], leg['lat2'], leg['lon2'], band)].append(factor)
+                by_band[band].append(factor)
+                speeds[band].append(leg['distance_km'] / (leg['duration_min'] / 60))
+
+        estimator = cls(
+            detour={key: float(np.median(v)) for key, v in by_cell.items() if len(v) >= MIN_SAMPLES},
+            band_detour={band: float(np.median(v)) for band, v in by_band.items()},
+            band_speed={band: float(np.median(v)) for band, v in speeds.items()},
+        )
+        print(f"✅ Calibrated {len(estimator.detour)} area cells from {sum(map(len, by_band.values()))} OSRM legs")
+        return estimator
+
+    def save(self, path=DISTANCE_TABLE_PATH):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'detour': self.detour, 'band_detour': self.band_detour, 'band_speed': self.band_speed}, f)
+
+    @classmethod
+    def load(cls, path=DISTANCE_TABLE_PATH, use_calibrated_speed=False):
+        """Loads a saved table; returns an uncalibrated estimator if there is none."""
+        if not os.path.exists(path):
+            return cls(use_calibrated_speed=use_calibrated_speed)
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        to_int_keys = lambda d: {int(k): v for k, v in d.items()}
+        return cls(data['detour'], to_int_keys(data['band_detour']), to_int_keys(data['band_speed']),
+                   use_calibrated_speed)
+
+    def estimate(self, lat1, lon1, lat2, lon2, default_speed_kmh=DEFAULT_SPEED_KMH):
+        """
+        Returns (road distance km, duration minutes) for a single leg, riding at
+        default_speed_kmh (or the calibrated band speed when use_calibrated_speed is set).
+        """
+        straight = utils.haversine_distance(lat1, lon1, lat2, lon2)
+        band = _band(straight)
+        factor = self.detour.get(_cell_key(lat1, lon1, lat2, lon2, band), self.band_detour.get(band, DEFAULT_DETOUR))
+        road = straight * factor
+        return road, road / self._speed(band, default_speed_kmh) * 60
+
+    def estimate_array(self, lat, lon, lats, lons, straight_km=None, default_speed_kmh=DEFAULT_SPEED_KMH):
+        """
+        Vectorized estimate from one point to arrays of points.
+        Pass precomputed haversine distances as straight_km to skip recomputing them.
+        Returns (road distance km array, duration minutes array).
+        """
+        if straight_km is None:
+            straight_km = utils.haversine_array(lat, lon, lats, lons)
+        bands = np.searchsorted(DISTANCE_BANDS_KM, straight_km, side='right')
+        if not self.calibrated:
+            return straight_km * DEFAULT_DETOUR, straight_km * DEFAULT_DETOUR / default_speed_kmh * 60
+
+        factors = self._band_factors[bands]
+        if self._cell_factors is not None:
+            i = np.floor((lat + np.asarray(lats)) / 2 / AREA_CELL_DEG).astype(int) - self._cell_origin[0]
+            j = np.floor((lon + np.asarray(lons)) / 2 / AREA_CELL_DEG).astype(int) - self._cell_origin[1]
+            inside = np.flatnonzero((i >= 0) & (i < self._cell_factors.shape[0]) & (j >= 0) & (j < self._cell_factors.shape[1]))
+            cell = self._cell_factors[i[inside], j[inside], bands[inside]]
+            known = ~np.isnan(cell)
+            factors[inside[known]] = cell[known]
+        speeds = np.array([self._speed(b, default_speed_kmh) for b in range(len(DISTANCE_BANDS_KM) + 1)])[bands]
+        road = straight_km * factors
+        return road, road / speeds * 60
+
+    def max_straight_km(self, minutes, default_speed_kmh=DEFAULT_SPEED_KMH):
+        """
+        Upper bound on the straight-line distance (km) of any leg estimated at no
+        more than 'minutes'; callers can drop points beyond it before estimating.
+        """
+        factors = list(self.band_detour.values()) + list(self.detour.values())
+        if len(self.band_detour) <= len(DISTANCE_BANDS_KM):
+            factors.append(DEFAULT_DETOUR)  # bands without data fall back to the default
+        speed = max(self._speed(band, default_speed_kmh) for band in range(len(DISTANCE_BANDS_KM) + 1))
+        return minutes / 60 * speed / min(factors)
+
+    def _speed(self, band, default_speed_kmh):
+        if self.use_calibrated_speed:
+            return self.band_speed.get(band, default_speed_kmh)
+        return default_speed_kmh
+
+    def estimate_route(self, points, default_speed_kmh=DEFAULT_SPEED_KMH):
+        """Sums the estimates over consecutive (lat, lon) points. Returns (km, minutes)."""
+        total_km = total_min = 0.0
+        for (lat1, lon1), (lat2, lon2) in zip(points, points[1:]):
+            km, minutes = self.estimate(lat1, lon1, lat2, lon2, default_speed_kmh)
+            total_km += km
+            total_min += minutes
+        return total_km, total_min
+
+
+_default_estimator = None
+
+def default_estimator():
+    """The estimator loaded from DISTANCE_TABLE_PATH, created on first use."""
+    global _default_estimator
+    if _default_estimator is None:
+        _default_estimator = DistanceEstimator.load(use_calibrated_speed=config.USE_CALIBRATED_SPEED)
+    return _default_estimator
+
+
+def _band(straight_km):
+    return bisect.bisect_right(DISTANCE_BANDS_KM, straight_km)
+
+
+def _dense_cells(detour):
+    """
+    Packs the "cell_lat,cell_lon,band" factors into a dense array indexed by
+    (cell_lat - origin_lat, cell_lon - origin_lon, band); cells without data are NaN.
+    Returns (origin, array), or (None, None) for an empty table.
+    """
+    if not detour:
+        return None, None
+    keys = np.array([[int(part) for part in key.split(',')] for key in detour])
+    origin = keys[:, :2].min(axis=0)
+    size = keys[:, :2].max(axis=0) - origin + 1
+    table = np.full((size[0], size[1], len(DISTANCE_BANDS_KM) + 1), np.nan)
+    table[keys[:, 0] - origin[0], keys[:, 1] - origin[1], keys[:, 2]] = list(detour.values())
+    return origin, table
+
+
+def _cell_key(lat1, lon1, lat2, lon2, band):
+    cell_lat = math.floor((lat1 + lat2) / 2 / AREA_CELL_DEG)
+    cell_lon = math.floor((lon1 + lon2) / 2 / AREA_CELL_DEG)
+    return f"{cell_lat},{cell_lon},{band}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calibrate the no-network distance estimator from logged OSRM legs')
+    parser.add_argument('--legs', default=config.OSRM_LEG_LOG_PATH or LEG_LOG_PATH, help='OSRM leg log (JSON lines)')
+    parser.add_argument('--output', default=DISTANCE_TABLE_PATH, help='Output lookup table')
+    args = parser.parse_args()
+
+    DistanceEstimator.calibrate(args.legs).save(args.output)
+    print(f"💾 Saved distance table to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+# loadtest.py
+"""
+Record-and-replay load testing for the shape-route planner.
+
+Recording: pass a TraceRecorder to RoutePlanner and every plan() and
+plan_alternatives() call is appended to a JSON-lines trace (ts, method, shape,
+lat, lon, overrides, snapshot_version, plus k for plan_alternatives). Replays
+call the recorded method, so alternatives requests carry their full cost.
+
+Replaying:
+  python loadtest.py freeze --output youbike_snapshot.json
+  python loadtest.py replay --trace plan_trace.jsonl --snapshot youbike_snapshot.json \
+      --concurrency 8 --rate 20 --osrm-latency 0.2
+
+A replay plans every traced request against one frozen YouBike snapshot, with
+an OSRM stand-in built on the calibrated distance estimator (optionally
+sleeping to mimic network latency), and reports throughput, latency
+percentiles, route-cache hit rate and tracemalloc memory samples over time.
+With --rate the requests are issued open-loop on a fixed schedule and latency
+is measured from the scheduled send time, so queueing delay is not hidden.
+With --processes the requests are planned in worker processes that attach the
+snapshot from shared memory (see shared_snapshot.py) instead of in threads.
+"""
+import argparse
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from distance_estimator import default_estimator
+from route_cache import snapshot_version
+from shared_snapshot import SnapshotPublisher, SnapshotView
+
+TRACE_PATH = 'plan_trace.jsonl'
+SNAPSHOT_PATH = 'youbike_snapshot.json'
+
+
+class TraceRecorder:
+    """Appends planning requests to a JSON-lines trace; safe to share between threads."""
+
+    def __init__(self, path=TRACE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, shape, lat, lon, snapshot_version, overrides=None, timestamp=None, method='plan', k=None):
+        request = {
+            'ts': time.time() if timestamp is None else timestamp,
+            'method': method,
+            'shape': shape,
+            'lat': lat,
+            'lon': lon,
+            'overrides': overrides or {},
+            'snapshot_version': snapshot_version,
+        }
+        if k is not None:
+            request['k'] = k
+        line = json.dumps(request, ensure_ascii=False)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+
+def load_trace(path=TRACE_PATH):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def freeze_snapshot(youbike_df, path=SNAPSHOT_PATH):
+    """Writes a YouBike snapshot to JSON so replays run against fixed data."""
+    # Full float precision keeps snapshot_version() identical after a round trip
+    youbike_df.to_json(path, orient='records', force_ascii=False, double_precision=15)
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    return pd.read_json(path, orient='records', dtype={'sno': str}, precise_float=True)
+
+
+def estimator_router(latency_s=0.0, speed_kmh=10):
+    """
+    OSRM stand-in: returns a router that answers from the distance estimator,
+    after sleeping latency_s seconds to mimic the network round trip.
+    """
+    def route(route):
+        if latency_s:
+            time.sleep(latency_s)
+        distance_km, duration_min = default_estimator().estimate_route(route.coords(), speed_kmh)
+        return {'coords': route.coords(), 'distance': distance_km, 'duration': duration_min, 'success': True}
+    return route
+
+
+def run_request(planner, request):
+    """
+    Plans one traced request with the method it was recorded from (traces
+    without a method are plain plan() calls). Returns 'ok' or 'no_route'.
+    """
+    overrides = request.get('overrides', {})
+    if request.get('method', 'plan') == 'plan_alternatives':
+        results = planner.plan_alternatives(request['shape'], request['lat'], request['lon'], request.get('k', 3), **overrides)
+        return 'ok' if results else 'no_route'
+    route, _ = planner.plan(request['shape'], request['lat'], request['lon'], **overrides)
+    return 'ok' if route is not None else 'no_route'
+
+
+def replay(planner, trace, concurrency=8, rate=None, sample_interval=1.0):
+    """
+    Replays 'trace' against 'planner' with 'concurrency' worker threads.
+    'rate' is requests per second (None: as fast as the workers allow).
+    Returns a report dict; see print_report().
+    """
+    if not trace:
+        raise ValueError("Trace is empty.")
+    task = functools.partial(_thread_task, planner)
+    report, _ = _drive(ThreadPoolExecutor(concurrency), task, trace, rate, sample_interval)
+    report['stale_versions'] = _stale_versions(trace, planner.version)
+    report['cache'] = planner.cache.stats()
+    return report
+
+
+def replay_processes(youbike_df, attractions_df, trace, processes=4, rate=None, osrm_latency=0.0, sample_interval=1.0):
+    """
+    Like replay(), but plans in 'processes' worker processes. The snapshot is
+    published once into shared memory; every worker attaches a zero-copy
+    SnapshotView and keeps its own warm RoutePlanner, so a task carries only its
+    trace entry. Cache stats are summed over the workers; memory samples cover
+    this process only.
+    """
+    if not trace:
+        raise ValueError("Trace is empty.")
+    publisher = SnapshotPublisher(f"route_algo_{os.getpid()}")
+    try:
+        publisher.publish(youbike_df, attractions_df)
+        executor = ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(publisher.name, osrm_latency))
+        report, worker_stats = _drive(executor, _process_task, trace, rate, sample_interval)
+    finally:
+        publisher.close()
+
+    latest = {}  # pid -> that worker's cumulative cache stats
+    for pid, stats in worker_stats:
+        if pid not in latest or stats['hits'] + stats['misses'] > latest[pid]['hits'] + latest[pid]['misses']:
+            latest[pid] = stats
+    hits = sum(stats['hits'] for stats in latest.values())
+    misses = sum(stats['misses'] for stats in latest.values())
+    report['stale_versions'] = _stale_versions(trace, snapshot_version(youbike_df))
+    report['cache'] = {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        'size': sum(stats['size'] for stats in latest.values()),
+    }
+    return report
+
+
+def _timed_request(planner, request):
+    """Runs one request; returns (outcome, seconds spent planning)."""
+    started = time.perf_counter()
+    try:
+        outcome = run_request(planner, request)
+    except Exception:
+        outcome = 'error'
+    return outcome, time.perf_counter() - started
+
+
+def _thread_task(planner, request):
+    return (*_timed_request(planner, request), None)
+
+
+_worker = None  # (SnapshotView, RoutePlanner) of a replay worker process
+
+
+def _init_worker(snapshot_name, osrm_latency):
+    global _worker
+    from planner import RoutePlanner
+
+    view = SnapshotView(snapshot_name)
+    _worker = (view, RoutePlanner(*view.frames(), router=estimator_router(osrm_latency)))
+
+
+def _process_task(request):
+    view, planner = _worker
+    if view.refresh():
+        # A new snapshot was published: hand it to the planner without copying the columns again
+        planner.refresh(*view.frames())
+    return (*_timed_request(planner, request), (os.getpid(), planner.cache.stats()))
+
+
+def _stale_versions(trace, version):
+    return sum(1 for request in trace if request.get('snapshot_version') not in (None, version))
+
+
+def _drive(executor, task, trace, rate, sample_interval):
+    """
+    Submits task(request) for every request to 'executor' and shuts it down;
+    tasks return (outcome, seconds, extra). With 'rate' the requests are sent
+    on a fixed schedule and latency runs from the scheduled send time; without
+    it latency is the time the task spent planning.
+    Returns (report, extras), the non-None extras in completion order.
+    """
+    latencies = np.full(len(trace), np.nan)
+    outcomes = [None] * len(trace)
+    extras = []
+
+    def finished(index, scheduled, future):
+        try:
+            outcome, seconds, extra = future.result()
+        except Exception:
+            # The task itself catches planning errors; this is a failed worker
+            outcome, seconds, extra = 'error', np.nan, None
+        outcomes[index] = outcome
+        latencies[index] = seconds if scheduled is None else time.perf_counter() - scheduled
+        if extra is not None:
+            extras.append(extra)
+
+    memory, done = [], threading.Event()
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    def sample_memory():
+        while True:
+            current, peak = tracemalloc.get_traced_memory()
+            memory.append((time.perf_counter() - started, current, peak))
+            if done.wait(sample_interval):
+                break
+
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    sampler.start()
+    with executor:
+        for index, request in enumerate(trace):
+            scheduled = None
+            if rate:
+                scheduled = started + index / rate
+                time.sleep(max(0.0, scheduled - time.perf_counter()))
+            executor.submit(task, request).add_done_callback(functools.partial(finished, index, scheduled))
+    elapsed = time.perf_counter() - started
+    done.set()
+    sampler.join()
+    current, peak = tracemalloc.get_traced_memory()
+    memory.append((elapsed, current, peak))
+    tracemalloc.stop()
+
+    ms = latencies * 1000
+    report = {
+        'requests': len(trace),
+        'ok': outcomes.count('ok'),
+        'no_route': outcomes.count('no_route'),
+        'errors': outcomes.count('error'),
+        'stale_versions': 0,
+        'elapsed_s': elapsed,
+        'throughput_rps': len(trace) / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'p50': float(np.nanpercentile(ms, 50)),
+            'p95': float(np.nanpercentile(ms, 95)),
+            'p99': float(np.nanpercentile(ms, 99)),
+            'max': float(np.nanmax(ms)),
+        },
+        'cache': None,
+        'memory': memory,
+        'memory_growth_bytes': memory[-1][1] - memory[0][1],
+    }
+    return report, extras
+
+
+def print_report(report):
+    print(f"📊 {report['requests']} requests in {report['elapsed_s']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s)")
+    print(f"   ok={report['ok']} no_route={report['no_route']} errors={report['errors']} "
+          f"stale_versions={report['stale_versions']}")
+    latency = report['latency_ms']
+    print(f"   latency p50={latency['p50']:.1f}ms p95={latency['p95']:.1f}ms "
+          f"p99={latency['p99']:.1f}ms max={latency['max']:.1f}ms")
+    cache = report['cache']
+    print(f"   cache hits={cache['hits']} misses={cache['misses']} "
+          f"hit_rate={cache['hit_rate']:.1%} size={cache['size']}")
+    print("   memory (traced, MiB):")
+    for elapsed, current, peak in report['memory']:
+        print(f"     {elapsed:7.1f}s  current={current / 2**20:8.2f}  peak={peak / 2**20:8.2f}")
+    print(f"   growth: {report['memory_growth_bytes'] / 2**20:+.2f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record/replay load test for the shape-route planner')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    freeze = sub.add_parser('freeze', help='Fetch the live YouBike snapshot and save it')
+    freeze.add_argument('--output', default=SNAPSHOT_PATH)
+
+    run = sub.add_parser('replay', help='Replay a recorded trace against a frozen snapshot')
+    run.add_argument('--trace', default=TRACE_PATH)
+    run.add_argument('--snapshot', default=SNAPSHOT_PATH)
+    run.add_argument('--concurrency', type=int, default=8)
+    run.add_argument('--processes', type=int, default=None,
+                     help='Plan in this many worker processes sharing the snapshot (default: threads)')
+    run.add_argument('--rate', type=float, default=None, help='Requests per second (default: unthrottled)')
+    run.add_argument('--repeat', type=int, default=1, help='Replay the trace this many times back to back')
+    run.add_argument('--osrm-latency', type=float, default=0.0, help='Seconds the OSRM stand-in sleeps per route')
+    run.add_argument('--sample-interval', type=float, default=1.0, help='Seconds between memory samples')
+    run.add_argument('--json', default=None, metavar='PATH', help='Also write the report as JSON')
+    args = parser.parse_args()
+
+    import tsp_taipei_route_new as shape_routes
+
+    if args.command == 'freeze':
+        freeze_snapshot(shape_routes.fetch_youbike_data(), args.output)
+        print(f"💾 Saved snapshot to {args.output}")
+        return
+
+    from planner import RoutePlanner
+
+    youbike_df, attractions_df = load_snapshot(args.snapshot), shape_routes.fetch_attractions_from_csv()
+    trace = load_trace(args.trace) * args.repeat
+    if args.processes:
+        print(f"▶️  Replaying {len(trace)} requests (processes={args.processes}, rate={args.rate or 'max'})")
+        report = replay_processes(youbike_df, attractions_df, trace, args.processes, args.rate,
+                                  args.osrm_latency, args.sample_interval)
+    else:
+        planner = RoutePlanner(youbike_df, attractions_df, router=estimator_router(args.osrm_latency))
+        print(f"▶️  Replaying {len(trace)} requests (concurrency={args.concurrency}, rate={args.rate or 'max'})")
+        report = replay(planner, trace, args.concurrency, args.rate, args.sample_interval)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
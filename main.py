@@ -1,14 +1,27 @@
 # main.py
+import argparse
 import data_loader
 import route_generator
 import map_creator
 import services
 import config
+import profiling
 
 def main():
+    parser = argparse.ArgumentParser(description='Draw a letter-shaped YouBike route over Taipei.')
+    parser.add_argument('--word', default=None,
+                        help="Letter or word to draw, e.g. 'T' or 'TAIPEI' (defaults to LETTER_TO_DRAW)")
+    parser.add_argument('--profile', default=None, metavar='PREFIX',
+                        help='Write cProfile/tracemalloc reports to PREFIX.prof/.txt/.collapsed')
+    args = parser.parse_args()
+
+    with profiling.maybe_profile(args.profile):
+        run(args.word)
+
+def run(word=None):
     # --- CONFIGURATION ---
-    # 1. Choose the letter to draw ('T', 'A', 'I', 'P', 'E')
-    LETTER_TO_DRAW = 'T'
+    # 1. Choose the letter to draw ('T', 'A', 'I', 'P', 'E') or a whole word ('TAIPEI')
+    LETTER_TO_DRAW = (word or 'T').upper()
     
     # 2. Set the desired number of attraction stops for the route
     MAX_ATTRACTIONS = 6  # <-- This is the new control variable (5-8 is a good range)
@@ -19,7 +32,7 @@ def main():
 
     # --- 1. Load All Necessary Data ---
     print("Loading data...")
-    attractions_df = data_loader.load_attractions(TAIPEI_ATTRACTIONS_CSV)
+    attractions_df = data_loader.load_attractions(TAIPEI_ATTRACTIONS_CSV, bbox=config.TAIPEI_BBOX)
     
     youbike_api_data = services.fetch_youbike_data()
     all_youbike_stations_df = data_loader.load_youbike_data_from_api(youbike_api_data)
@@ -31,13 +44,23 @@ def main():
     active_youbike_df = all_youbike_stations_df[all_youbike_stations_df['available_bikes'] > 0].copy()
 
     # --- 2. Generate the Creative Route ---
-    print(f"\nGenerating route for the letter '{LETTER_TO_DRAW}' with a max of {MAX_ATTRACTIONS} stops...")
-    final_route = route_generator.generate_taipei_letter_route(
-        attractions_df, 
-        active_youbike_df, 
-        LETTER_TO_DRAW,
-        MAX_ATTRACTIONS  # <-- Pass the new variable to the function
-    )
+    if len(LETTER_TO_DRAW) > 1:
+        # Whole words are planned in one pass with a shared station and attraction pool
+        print(f"\nGenerating route for the word '{LETTER_TO_DRAW}' with a max of {MAX_ATTRACTIONS} stops per letter...")
+        final_route = route_generator.generate_taipei_word_route(
+            attractions_df,
+            active_youbike_df,
+            LETTER_TO_DRAW,
+            MAX_ATTRACTIONS
+        )
+    else:
+        print(f"\nGenerating route for the letter '{LETTER_TO_DRAW}' with a max of {MAX_ATTRACTIONS} stops...")
+        final_route = route_generator.generate_taipei_letter_route(
+            attractions_df, 
+            active_youbike_df, 
+            LETTER_TO_DRAW,
+            MAX_ATTRACTIONS  # <-- Pass the new variable to the function
+        )
 
     if not final_route or len(final_route) <= 2:
         print(f"Exiting: Route generation for letter '{LETTER_TO_DRAW}' failed or found no valid points.")
@@ -45,7 +68,7 @@ def main():
         
     print("\n--- Final Route Sequence ---")
     for i, point in enumerate(final_route):
-        print(f"{i}. [{point['type'].upper()}] {point['name']}")
+        print(f"{i}. [{point.kind.upper()}] {point.name}")
 
     # --- 3. Create the Map ---
     output_filename = f'taipei_letter_route_{LETTER_TO_DRAW}.html'
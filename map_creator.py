@@ -1,6 +1,8 @@
 # map_creator.py
 import folium
 import services
+from distance_estimator import default_estimator
+import config
 
 def create_letter_route_map(route, output_path='taipei_letter_route.html'):
     """
@@ -11,7 +13,7 @@ def create_letter_route_map(route, output_path='taipei_letter_route.html'):
         return
 
     # Center the map on the user's starting location
-    start_lat, start_lon = route[0]['lat'], route[0]['lon']
+    start_lat, start_lon = route[0].lat, route[0].lon
     m = folium.Map(location=[start_lat, start_lon], zoom_start=13)
 
     # --- The gray background letter shapes have been removed as requested. ---
@@ -33,16 +35,21 @@ def create_letter_route_map(route, output_path='taipei_letter_route.html'):
     else:
         # This is a fallback in case the OSRM service is down
         print("Could not fetch the OSRM route. Drawing straight lines as a fallback.")
-        route_coords = [(point['lat'], point['lon']) for point in route]
-        folium.PolyLine(route_coords, color="red", weight=3, opacity=0.8, dash_array='5, 10').add_to(m)
+        route_coords = route.coords()
+        est_km, est_min = default_estimator().estimate_route(route_coords, config.AVG_BIKE_SPEED_KMH)
+        print(f"Estimated road distance: {est_km:.2f} km, riding time: {est_min:.1f} mins")
+        folium.PolyLine(
+            route_coords, color="red", weight=3, opacity=0.8, dash_array='5, 10',
+            popup=f"Estimated: {est_km:.2f} km / {est_min:.1f} mins"
+        ).add_to(m)
 
     # --- Add markers for each point in the route (this logic is unchanged) ---
     for i, point in enumerate(route):
         color_map = {'user': 'red', 'ubike': 'orange', 'attraction': 'green'}
         folium.Marker(
-            location=(point['lat'], point['lon']),
-            popup=f"<b>{i}. {point['name']}</b><br>({point['type']})",
-            icon=folium.Icon(color=color_map.get(point['type'], 'blue'), icon='info-sign')
+            location=(point.lat, point.lon),
+            popup=f"<b>{i}. {point.name}</b><br>({point.kind})",
+            icon=folium.Icon(color=color_map.get(point.kind, 'blue'), icon='info-sign')
         ).add_to(m)
         
     m.save(output_path)
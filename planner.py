@@ -0,0 +1,181 @@
+# planner.py
+"""
+In-process shape-route planning for library callers.
+
+    planner = RoutePlanner()                       # fetches YouBike + attractions once
+    route, osrm_result = planner.plan('S', 25.0218, 121.5354, max_segment_time=15)
+    ...
+    planner.refresh()                              # new YouBike snapshot, same caches
+
+The planner keeps everything that is expensive to build (station snapshot
+columns, nearest-station grid, projected attractions, route cache) warm across
+calls. All of it lives in one immutable PlannerState; plan() reads the current
+state once and works only on that object, so refresh() can build the next state
+and swap it in without waiting for, or disturbing, plans that are in flight.
+The pipeline's progress output is silenced for planner calls unless the planner
+is created with verbose=True.
+"""
+import contextlib
+import copy
+import threading
+from collections import namedtuple
+
+import tsp_taipei_route_new as shape_routes
+from route_cache import RouteCache
+from station_grid import StationGrid
+
+# 'generation' increases with every refresh(); plans pass it to the route cache so a
+# plan that started before a refresh cannot store a route built on old availability
+PlannerState = namedtuple('PlannerState', ['youbike_df', 'attractions_df', 'snapshot', 'grid', 'attractions_xy', 'generation'])
+
+
+class RoutePlanner:
+    """
+    Thread-safe wrapper around the shape-route pipeline.
+    'config' is the base RouteConfig that per-call overrides are applied to;
+    'router' turns a Route into an OSRM-style result dict (get_osrm_route by default);
+    'recorder' (e.g. loadtest.TraceRecorder) is told about every accepted request;
+    'verbose' keeps the pipeline's progress prints (off by default).
+    """
+
+    def __init__(self, youbike_df=None, attractions_df=None, config=None, predictor=None, router=None,
+                 cache=None, cache_size=128, recorder=None, verbose=False):
+        self.base_config = config if config is not None else shape_routes.RouteConfig()
+        self.predictor = predictor
+        self.router = router if router is not None else shape_routes.get_osrm_route
+        self.cache = cache if cache is not None else RouteCache(max_size=cache_size)
+        self.recorder = recorder
+        self.verbose = verbose
+        self._refresh_lock = threading.Lock()
+        with self._output():
+            self._state = self._build_state(
+                shape_routes.fetch_youbike_data() if youbike_df is None else youbike_df,
+                shape_routes.fetch_attractions_from_csv() if attractions_df is None else attractions_df,
+            )
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def version(self):
+        return self._state.snapshot.version
+
+    def plan(self, shape, lat, lon, **overrides):
+        """
+        Plans a 'shape' route starting at the YouBike station nearest to (lat, lon).
+        Keyword arguments override RouteConfig fields for this call only; unknown
+        names raise TypeError. Returns (Route, osrm_result), or (None, None) when
+        no route could be built. Cached results are shared between callers, so
+        treat the returned objects as read-only.
+        """
+        state = self._state  # one read; a concurrent refresh() cannot change it under us
+        config = self._config_for(shape, lat, lon, overrides)
+        if self.recorder is not None:
+            self.recorder.record(shape, lat, lon, state.snapshot.version, overrides)
+        with self._output():
+            start_station = self._start_station(state, config, lat, lon)
+            return shape_routes.plan_shape_route(
+                state.youbike_df,
+                state.attractions_df,
+                start_station,
+                config,
+                cache=self.cache,
+                snapshot=state.snapshot,
+                predictor=self.predictor,
+                router=self.router,
+                attractions_xy=state.attractions_xy,
+                generation=state.generation,
+            )
+
+    def plan_alternatives(self, shape, lat, lon, k=3, **overrides):
+        """
+        Like plan(), but returns up to k distinct alternatives in one pass as
+        [(Route, osrm_result, metrics)], best first; metrics holds the combined
+        score and its parts (similarity, ride_minutes, minutes_per_km, coverage)
+        plus the template rotation and scale the alternative was drawn with; the
+        configured template (rotation +0, scale x1.0) is always among them.
+        """
+        state = self._state
+        config = self._config_for(shape, lat, lon, overrides)
+        if self.recorder is not None:
+            self.recorder.record(shape, lat, lon, state.snapshot.version, overrides, method='plan_alternatives', k=k)
+        with self._output():
+            start_station = self._start_station(state, config, lat, lon)
+            return shape_routes.plan_shape_alternatives(
+                state.youbike_df,
+                state.attractions_df,
+                start_station,
+                config,
+                k,
+                cache=self.cache,
+                snapshot=state.snapshot,
+                predictor=self.predictor,
+                router=self.router,
+                attractions_xy=state.attractions_xy,
+                generation=state.generation,
+            )
+
+    def refresh(self, youbike_df=None, attractions_df=None):
+        """
+        Swaps in a new YouBike snapshot (fetched when not given) and optionally new
+        attractions. Cached routes whose stations fell below their thresholds are
+        evicted, and new attractions clear the whole cache (the key does not cover
+        them); plans already running finish on the state they started with,
+        and their results are no longer stored in the cache.
+        Returns the number of evicted cache entries.
+        """
+        with self._refresh_lock, self._output():
+            current = self._state
+            if youbike_df is None:
+                youbike_df = shape_routes.fetch_youbike_data()
+            state = self._build_state(youbike_df, attractions_df, current)
+            self._state = state
+            evicted = self.cache.refresh(youbike_df, generation=state.generation)
+            if attractions_df is not None:
+                evicted += self.cache.clear()
+            return evicted
+
+    def _output(self):
+        return contextlib.nullcontext() if self.verbose else shape_routes.quiet()
+
+    def _start_station(self, state, config, lat, lon):
+        grid = state.grid if config.min_available_bikes in state.grid.thresholds else None
+        return shape_routes.find_nearest_youbike(lat, lon, state.youbike_df, config.min_available_bikes, grid=grid)
+
+    def _build_state(self, youbike_df, attractions_df=None, previous=None):
+        """
+        Builds the next state. With a previous state, unchanged attractions keep
+        their projection, and when the station layout is unchanged the grid is
+        copied and updated incrementally instead of being rebuilt.
+        """
+        snapshot = shape_routes.StationSnapshot(youbike_df)
+        if previous is not None and previous.snapshot.version == snapshot.version:
+            grid = previous.grid.copy()
+            grid.update_from_snapshot(youbike_df)
+        else:
+            grid = StationGrid(youbike_df, thresholds=(0, self.base_config.min_available_bikes))
+
+        if attractions_df is None:
+            attractions_df, attractions_xy = previous.attractions_df, previous.attractions_xy
+        else:
+            attractions_xy = shape_routes.project_attractions(attractions_df)
+        return PlannerState(
+            youbike_df=youbike_df,
+            attractions_df=attractions_df,
+            snapshot=snapshot,
+            grid=grid,
+            attractions_xy=attractions_xy,
+            generation=0 if previous is None else previous.generation + 1,
+        )
+
+    def _config_for(self, shape, lat, lon, overrides):
+        config = copy.copy(self.base_config)
+        unknown = sorted(set(overrides) - set(vars(config)))
+        if unknown:
+            raise TypeError(f"Unknown RouteConfig field(s): {', '.join(unknown)}")
+        for field, value in overrides.items():
+            setattr(config, field, value)
+        config.target_shape = shape.upper()
+        config.user_location = {'lat': lat, 'lon': lon}
+        return config
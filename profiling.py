@@ -0,0 +1,156 @@
+# profiling.py
+"""
+Profiling helpers for the route planner CLIs.
+
+Both entry points accept --profile PREFIX, which writes:
+  PREFIX.prof       raw cProfile data (loadable with pstats / snakeviz)
+  PREFIX.txt        hot functions by self and cumulative time, plus tracemalloc peak
+  PREFIX.collapsed  collapsed stacks for flamegraph.pl / speedscope
+
+Compare two runs with:
+  python profiling.py compare before.prof after.prof
+"""
+import argparse
+import contextlib
+import cProfile
+import os
+import pstats
+import tracemalloc
+
+
+@contextlib.contextmanager
+def profile_run(output_prefix, top=30):
+    """Profiles the enclosed block with cProfile and tracemalloc and writes the reports."""
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        write_reports(profiler, output_prefix, peak, snapshot, top)
+
+
+def maybe_profile(output_prefix):
+    """Returns profile_run(output_prefix), or a no-op context when no prefix is given."""
+    if not output_prefix:
+        return contextlib.nullcontext()
+    return profile_run(output_prefix)
+
+
+def write_reports(profiler, output_prefix, peak_bytes, snapshot, top=30):
+    profiler.dump_stats(f"{output_prefix}.prof")
+    stats = pstats.Stats(profiler)
+
+    with open(f"{output_prefix}.txt", 'w', encoding='utf-8') as f:
+        f.write(f"Peak traced memory: {peak_bytes / 1024 / 1024:.2f} MiB\n")
+        f.write(f"Total time: {stats.total_tt:.3f} s\n\n")
+        for title, key in (("self time", 'tottime'), ("cumulative time", 'cumulative')):
+            f.write(f"=== Top {top} functions by {title} ===\n")
+            f.write(_format_rows(_sorted_rows(stats.stats, key)[:top]))
+            f.write("\n")
+        f.write(f"=== Top {top} allocation sites ===\n")
+        for stat in snapshot.statistics('lineno')[:top]:
+            f.write(f"{stat.size / 1024:10.1f} KiB  {stat.count:8d} blocks  {stat.traceback[0]}\n")
+
+    with open(f"{output_prefix}.collapsed", 'w', encoding='utf-8') as f:
+        for stack, micros in sorted(collapsed_stacks(stats.stats).items()):
+            if micros > 0:
+                f.write(f"{stack} {micros}\n")
+
+    print(f"📊 Profile written to {output_prefix}.prof / .txt / .collapsed")
+
+
+def collapsed_stacks(raw_stats, min_seconds=1e-5, max_depth=64):
+    """
+    Rebuilds approximate call stacks from cProfile's caller graph.
+    A function's self time is split across its callers in proportion to the
+    cumulative time each call edge contributed. Returns {stack: microseconds}.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in raw_stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge[3]
+
+    stacks = {}
+
+    def walk(func, stack, ratio):
+        _, _, self_time, cumulative, _ = raw_stats[func]
+        stack = stack + (_label(func),)
+        key = ';'.join(stack)
+        stacks[key] = stacks.get(key, 0) + int(self_time * ratio * 1e6)
+        if len(stack) >= max_depth:
+            return
+        for callee, edge_time in callees.get(func, {}).items():
+            callee_total = raw_stats[callee][3]
+            share = ratio * edge_time / callee_total if callee_total > 0 else 0
+            if _label(callee) in stack or share * callee_total < min_seconds:
+                continue
+            walk(callee, stack, share)
+
+    for func, (_, _, _, _, callers) in raw_stats.items():
+        if not callers:
+            walk(func, (), 1.0)
+    return stacks
+
+
+def compare_profiles(before_path, after_path, top=25):
+    """Prints the functions whose self time changed most between two .prof files."""
+    before = _totals(pstats.Stats(before_path).stats)
+    after = _totals(pstats.Stats(after_path).stats)
+
+    rows = []
+    for func in set(before) | set(after):
+        b_tt, b_ct, b_nc = before.get(func, (0.0, 0.0, 0))
+        a_tt, a_ct, a_nc = after.get(func, (0.0, 0.0, 0))
+        rows.append((a_tt - b_tt, a_ct - b_ct, b_nc, a_nc, func))
+    rows.sort(key=lambda r: abs(r[0]), reverse=True)
+
+    print(f"{'Δself(s)':>10} {'Δcum(s)':>10} {'calls before':>13} {'calls after':>12}  function")
+    for d_tt, d_ct, b_nc, a_nc, func in rows[:top]:
+        print(f"{d_tt:+10.4f} {d_ct:+10.4f} {b_nc:13d} {a_nc:12d}  {func}")
+
+
+def _label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        return name
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def _totals(raw_stats):
+    return {_label(func): (tt, ct, nc) for func, (_, nc, tt, ct, _) in raw_stats.items()}
+
+
+def _sorted_rows(raw_stats, key):
+    index = 2 if key == 'tottime' else 3
+    rows = [(v[index], v[2], v[3], v[1], func) for func, v in raw_stats.items()]
+    rows.sort(key=lambda r: r[0], reverse=True)
+    return rows
+
+
+def _format_rows(rows):
+    lines = [f"{'self(s)':>10} {'cum(s)':>10} {'calls':>9}  function"]
+    for _, tt, ct, nc, func in rows:
+        lines.append(f"{tt:10.4f} {ct:10.4f} {nc:9d}  {_label(func)}")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Route planner profiling tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compare = subparsers.add_parser('compare', help='Diff two .prof files by self time')
+    compare.add_argument('before')
+    compare.add_argument('after')
+    compare.add_argument('--top', type=int, default=25)
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        compare_profiles(args.before, args.after, args.top)
+
+
+if __name__ == '__main__':
+    main()
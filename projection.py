@@ -0,0 +1,62 @@
+# projection.py
+"""
+Local east/north metric frame around Taipei.
+
+Geographic coordinates are projected once onto a tangent plane at the frame's
+origin (x = meters east, y = meters north), using the WGS84 radii of curvature
+there. Within the city (±20 km of the origin) the scale error stays below
+0.2 %, which is far below YouBike station spacing, so nearest-point matching
+and short distances can use plain Euclidean arithmetic on NumPy arrays instead
+of per-pair haversine. All functions accept scalars or arrays.
+"""
+import math
+
+import numpy as np
+
+WGS84_A = 6378137.0
+WGS84_E2 = 6.69437999014e-3
+TAIPEI_ORIGIN = (25.04, 121.53)
+
+
+class LocalFrame:
+    """Tangent-plane frame with its origin at (origin_lat, origin_lon)."""
+
+    def __init__(self, origin_lat, origin_lon):
+        self.origin_lat = origin_lat
+        self.origin_lon = origin_lon
+        phi = math.radians(origin_lat)
+        s = 1 - WGS84_E2 * math.sin(phi) ** 2
+        meridian_radius = WGS84_A * (1 - WGS84_E2) / s ** 1.5
+        normal_radius = WGS84_A / math.sqrt(s)
+        self.m_per_deg_lat = math.radians(1) * meridian_radius
+        self.m_per_deg_lon = math.radians(1) * normal_radius * math.cos(phi)
+
+    def to_local(self, lat, lon):
+        """Returns (x, y) in meters east/north of the origin."""
+        x = (np.asarray(lon, dtype=float) - self.origin_lon) * self.m_per_deg_lon
+        y = (np.asarray(lat, dtype=float) - self.origin_lat) * self.m_per_deg_lat
+        return x, y
+
+    def to_geo(self, x, y):
+        """Inverse of to_local: returns (lat, lon)."""
+        lat = self.origin_lat + np.asarray(y, dtype=float) / self.m_per_deg_lat
+        lon = self.origin_lon + np.asarray(x, dtype=float) / self.m_per_deg_lon
+        return lat, lon
+
+    def distance_km(self, x, y, xs, ys):
+        """Euclidean distance (km) from one local point to arrays of local points."""
+        return np.hypot(np.asarray(xs) - x, np.asarray(ys) - y) / 1000
+
+
+TAIPEI_FRAME = LocalFrame(*TAIPEI_ORIGIN)
+
+
+def affine(points, scale=1.0, rotation_deg=0.0, offset=(0.0, 0.0)):
+    """
+    Scales, rotates (counter-clockwise) and translates an (N, 2) array of
+    (x, y) points in one matrix product.
+    """
+    theta = math.radians(rotation_deg)
+    c, s = math.cos(theta), math.sin(theta)
+    matrix = scale * np.array([[c, s], [-s, c]])  # row-vector form of [[c, -s], [s, c]]
+    return np.asarray(points, dtype=float) @ matrix + np.asarray(offset, dtype=float)
@@ -0,0 +1,150 @@
+# route_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# RouteConfig fields that change the outcome of a planned route
+CONFIG_KEY_FIELDS = (
+    'max_segment_time',
+    'max_segment_distance',
+    'cycling_speed',
+    'min_available_bikes',
+    'min_available_spaces',
+    'attraction_radius',
+    'template_rotation',
+)
+
+
+def snapshot_version(youbike_df, id_col='sno', lat_col='latitude', lon_col='longitude'):
+    """
+    Hashes the station layout (IDs and coordinates) of a YouBike snapshot.
+    Availability is left out on purpose: a routine feed refresh keeps the same
+    version, and availability changes are handled by RouteCache.refresh().
+    """
+    hashed = pd.util.hash_pandas_object(youbike_df[[id_col, lat_col, lon_col]], index=False)
+    return hashlib.sha1(hashed.values.tobytes()).hexdigest()[:16]
+
+
+class RouteCache:
+    """
+    Size-bounded LRU cache of fully planned routes.
+    Each entry remembers the stations it uses, so a feed refresh only evicts the
+    routes whose stations dropped below the route's availability thresholds.
+    'generation' counts applied availability snapshots; a route planned on an
+    older generation than the cache has seen is not stored.
+    """
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._keys_by_station = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(shape, start_sno, config, version):
+        """Builds the cache key from the shape, start station, config and snapshot version."""
+        config_key = tuple(getattr(config, field) for field in CONFIG_KEY_FIELDS)
+        return (shape, str(start_sno), config_key, version)
+
+    def get(self, key):
+        """Returns the cached value for key (marking it recently used), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, station_ids, min_bikes, min_spaces, generation=None):
+        """
+        Stores a planned route. 'station_ids' are the sno values the route
+        passes through; min_bikes/min_spaces are the thresholds it was planned with.
+        'generation' is the availability generation the route was planned on; the
+        route is dropped if refresh() has since applied a newer one.
+        Returns True if the route was stored.
+        """
+        station_ids = frozenset(str(sno) for sno in station_ids)
+        with self._lock:
+            if generation is not None and generation < self.generation:
+                return False
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (value, station_ids, (min_bikes, min_spaces))
+            for sno in station_ids:
+                self._keys_by_station.setdefault(sno, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest_key = next(iter(self._entries))
+                self._discard(oldest_key)
+            return True
+
+    def refresh(self, youbike_df, id_col='sno', rent_col='available_rent_bikes',
+                return_col='available_return_bikes', generation=None):
+        """
+        Applies a new availability snapshot. Only routes with a station that
+        disappeared or no longer meets its thresholds are evicted.
+        'generation' (if given) becomes the cache's current generation; later
+        put() calls from plans on older generations are ignored.
+        Returns the number of evicted routes.
+        """
+        with self._lock:
+            if generation is not None:
+                self.generation = max(self.generation, generation)
+            if not self._keys_by_station:
+                return 0
+
+            station_ids = youbike_df[id_col].astype(str)
+            tracked = youbike_df[station_ids.isin(self._keys_by_station.keys())]
+            availability = {
+                str(sno): (rent, ret)
+                for sno, rent, ret in zip(tracked[id_col], tracked[rent_col], tracked[return_col])
+            }
+
+            stale = set()
+            for sno, keys in self._keys_by_station.items():
+                current = availability.get(sno)
+                for key in keys:
+                    min_bikes, min_spaces = self._entries[key][2]
+                    if current is None or current[0] < min_bikes or current[1] < min_spaces:
+                        stale.add(key)
+
+            for key in stale:
+                self._discard(key)
+            return len(stale)
+
+    def clear(self):
+        """Drops every cached route. Returns the number of dropped routes."""
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._keys_by_station.clear()
+            return dropped
+
+    def stats(self):
+        """Returns hit/miss counters and the current size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._entries),
+            }
+
+    def _discard(self, key):
+        _, station_ids, _ = self._entries.pop(key)
+        for sno in station_ids:
+            keys = self._keys_by_station.get(sno)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_station[sno]
@@ -1,13 +1,107 @@
 # route_generator.py
 import utils
 import config
-import pandas as pd
 import math
+import numpy as np
+import pandas as pd
+from route_model import Route, Stop
+from distance_estimator import default_estimator
+
+def _nearest_station(lat, lon, youbike_df, station_grid=None, exclude=None):
+    """
+    Resolves the nearest bike station as a Stop, using the precomputed grid when available.
+    'exclude' is a set of row positions that must not be picked again.
+    """
+    if station_grid is None:
+        distances = utils.haversine_array(lat, lon, youbike_df['lat'].to_numpy(dtype=float), youbike_df['lon'].to_numpy(dtype=float))
+        if exclude:
+            distances[list(exclude)] = np.inf
+        if distances.size == 0 or np.isinf(distances.min()):
+            return None
+        position = int(np.argmin(distances))
+    else:
+        found = station_grid.nearest(lat, lon, exclude=exclude)
+        if found is None:
+            return None
+        position, _ = found
+    station = youbike_df.iloc[position]
+    return Stop('ubike', station['name'], station['lat'], station['lon'], row=position,
+                available_bikes=int(station['available_bikes']))
+
+def _leg_minutes(a, b):
+    """
+    Estimated biking time in minutes between two stops (calibrated road estimate,
+    see distance_estimator.py).
+    """
+    _, minutes = default_estimator().estimate(a.lat, a.lon, b.lat, b.lon, config.AVG_BIKE_SPEED_KMH)
+    return minutes
+
+def _stroke_attractions(segment, attractions_df):
+    """
+    Returns [(name, Stop)] for the attractions along one stroke, sorted from the
+    stroke's start point.
+    """
+    (lat1, lon1), _ = segment
+    nearby_attractions = utils.find_points_near_path(segment, attractions_df, threshold_km=0.35)
+    stroke = []
+    if not nearby_attractions.empty:
+        distances = utils.haversine_array(lat1, lon1, nearby_attractions['nlat'].to_numpy(), nearby_attractions['elong'].to_numpy())
+        for i in distances.argsort(kind='stable'):
+            name, name_zh = nearby_attractions['name'].iat[i], nearby_attractions['name_zh'].iat[i]
+            stroke.append((
+                name,
+                Stop('attraction', name_zh if pd.notna(name_zh) else name, nearby_attractions['nlat'].iat[i], nearby_attractions['elong'].iat[i])
+            ))
+    return stroke
+
+def _ordered_attractions(segments, attractions_df, seen_names, group=None):
+    """
+    Builds the list of attractions by following the strokes IN ORDER, skipping
+    names already in seen_names (which is updated in place).
+    """
+    ordered = []
+    for segment in segments:
+        for name, stop in _stroke_attractions(segment, attractions_df):
+            if name not in seen_names:
+                ordered.append(Stop('attraction', stop.name, stop.lat, stop.lon, group=group))
+                seen_names.add(name)
+    return ordered
+
+def _downsample(ordered_attractions, max_attractions):
+    """
+    Keeps ~max_attractions evenly spaced points of an ordered list.
+    """
+    if len(ordered_attractions) <= max_attractions:
+        return ordered_attractions
+    print(f"Found {len(ordered_attractions)} attractions. Selecting ~{max_attractions} evenly spaced points to form the shape.")
+    step = len(ordered_attractions) / max_attractions
+    return [ordered_attractions[int(i * step)] for i in range(max_attractions)]
+
+def layout_word(word, origin_lon=config.WORD_ORIGIN_LON, spacing=config.LETTER_SPACING_DEG):
+    """
+    Places the letters of a word left to right over the city.
+    Returns [(letter, segments)] with each letter's strokes shifted into place,
+    or an empty list if a letter is not defined in config.py.
+    """
+    placed = []
+    cursor = origin_lon
+    for letter in word.upper():
+        segments = config.LETTER_SHAPES.get(letter)
+        if not segments:
+            print(f"Error: Letter '{letter}' is not defined in config.py.")
+            return []
+        lons = [lon for segment in segments for _, lon in segment]
+        shift = cursor - min(lons)
+        placed.append((letter, [tuple((lat, lon + shift) for lat, lon in segment) for segment in segments]))
+        cursor = max(lons) + shift + spacing
+    return placed
 
-def generate_taipei_letter_route(attractions_df, youbike_df, letter_to_draw='T', max_attractions=7):
+def generate_taipei_letter_route(attractions_df, youbike_df, letter_to_draw='T', max_attractions=7, station_grid=None):
     """
     Generates a clean, ordered route that correctly follows the drawing path
     of a single letter, then downsamples the attractions to a specified number.
+    Pass a StationGrid built over youbike_df when it is reused across many plans;
+    otherwise nearest stations are found with one vectorized scan each.
     """
     letter = letter_to_draw.upper()
     segments = config.LETTER_SHAPES.get(letter)
@@ -18,68 +112,107 @@ def generate_taipei_letter_route(attractions_df, youbike_df, letter_to_draw='T',
     print(f"--- Processing Letter: {letter} ---")
 
     # --- Step 1: Build a master list of attractions by following the strokes IN ORDER ---
-    ordered_attractions_full = []
-    seen_names = set()
-
-    for segment in segments:
-        (lat1, lon1), _ = segment
-        nearby_attractions = utils.find_points_near_path(segment, attractions_df, threshold_km=0.35)
-        
-        if nearby_attractions.empty:
-            continue
-        
-        # Sort attractions along the current stroke
-        projections = []
-        for _, row in nearby_attractions.iterrows():
-            dist = utils.haversine_distance(lat1, lon1, row['nlat'], row['elong'])
-            projections.append({'dist': dist, 'attraction': row})
-        
-        projections.sort(key=lambda x: x['dist'])
-        
-        # Add the sorted attractions from this stroke to the master list, avoiding duplicates
-        for p in projections:
-            attraction = p['attraction']
-            if attraction['name'] not in seen_names:
-                ordered_attractions_full.append(attraction)
-                seen_names.add(attraction['name'])
+    ordered_attractions_full = _ordered_attractions(segments, attractions_df, set())
 
     if not ordered_attractions_full:
         print(f"No attractions found along the path for letter {letter}.")
         return []
 
     # --- Step 2: Downsample the correctly ordered list to the desired number of stops ---
-    if len(ordered_attractions_full) > max_attractions:
-        print(f"Found {len(ordered_attractions_full)} attractions. Selecting ~{max_attractions} evenly spaced points to form the shape.")
-        step = len(ordered_attractions_full) / max_attractions
-        indices = [int(i * step) for i in range(max_attractions)]
-        selected_attractions = [ordered_attractions_full[i] for i in indices]
-    else:
-        selected_attractions = ordered_attractions_full
-    
+    selected_attractions = _downsample(ordered_attractions_full, max_attractions)
     print(f"Using {len(selected_attractions)} attractions for the final route.")
 
     # --- Step 3: Build the final route sequence with bike stations ---
-    full_route = []
-    user_location = {'type': 'user', 'name': 'Your Location', 'lat': config.USER_LAT, 'lon': config.USER_LON}
-    full_route.append(user_location)
-    
-    last_bike_station = utils.find_nearest_point(config.USER_LAT, config.USER_LON, youbike_df)
-    full_route.append({'type': 'ubike', 'name': last_bike_station['name'], 'lat': last_bike_station['lat'], 'lon': last_bike_station['lon']})
-
-    for attraction in selected_attractions:
-        attraction_name = attraction['name_zh'] if pd.notna(attraction['name_zh']) else attraction['name']
-        attraction_point = {'type': 'attraction', 'name': attraction_name, 'lat': attraction['nlat'], 'lon': attraction['elong']}
-        
-        next_bike_station = utils.find_nearest_point(attraction['nlat'], attraction['elong'], youbike_df)
-        
-        dist_km = utils.haversine_distance(next_bike_station['lat'], next_bike_station['lon'], attraction['nlat'], attraction['elong'])
-        biking_time = utils.calculate_biking_time(dist_km, config.AVG_BIKE_SPEED_KMH)
+    full_route = Route(letter)
+    full_route.stops.append(Stop('user', 'Your Location', config.USER_LAT, config.USER_LON))
+    full_route.stops.append(_nearest_station(config.USER_LAT, config.USER_LON, youbike_df, station_grid))
+
+    for attraction_point in selected_attractions:
+        attraction_name = attraction_point.name
+        next_bike_station = _nearest_station(attraction_point.lat, attraction_point.lon, youbike_df, station_grid)
+        biking_time = _leg_minutes(next_bike_station, attraction_point)
 
         if biking_time <= config.MAX_BIKE_TIME_MINS:
             print(f"  - Adding '{attraction_name}' to route (Bike time: {biking_time:.1f} mins)")
-            full_route.append(attraction_point)
-            full_route.append({'type': 'ubike', 'name': next_bike_station['name'], 'lat': next_bike_station['lat'], 'lon': next_bike_station['lon']})
+            full_route.stops.append(attraction_point)
+            full_route.stops.append(next_bike_station)
         else:
             print(f"  - Skipping '{attraction_name}' (Bike time: {biking_time:.1f} mins > {config.MAX_BIKE_TIME_MINS})")
-            
-    return full_route
\ No newline at end of file
+
+    return full_route
+
+def _connect(route, target, youbike_df, station_grid, used_rows):
+    """
+    Adds relay stations between the route's last stop and 'target' so that no
+    connecting leg exceeds MAX_BIKE_TIME_MINS.
+    """
+    last = route.stops[-1]
+    hops = math.ceil(_leg_minutes(last, target) / config.MAX_BIKE_TIME_MINS)
+    for k in range(1, hops):
+        lat = last.lat + (target.lat - last.lat) * k / hops
+        lon = last.lon + (target.lon - last.lon) * k / hops
+        relay = _nearest_station(lat, lon, youbike_df, station_grid, exclude=used_rows)
+        if relay is None:
+            return
+        print(f"  - Relay station '{relay.name}' between letters")
+        route.stops.append(relay)
+        used_rows.add(relay.row)
+
+def generate_taipei_word_route(attractions_df, youbike_df, word='TAIPEI', max_attractions=6, station_grid=None):
+    """
+    Plans every letter of a word in one pass. All letters share the station grid (if given),
+    one attraction pool clipped to the word's extent and the set of used stations,
+    so no station is visited twice. Letters are joined through relay stations
+    whenever a connecting leg is too long.
+    """
+    placed = layout_word(word)
+    if not placed:
+        return []
+
+    # One attraction pool for the whole word instead of one full-table scan per stroke
+    points = [point for _, segments in placed for segment in segments for point in segment]
+    lats, lons = [p[0] for p in points], [p[1] for p in points]
+    attraction_pool = attractions_df[
+        attractions_df['nlat'].between(min(lats) - 0.01, max(lats) + 0.01) &
+        attractions_df['elong'].between(min(lons) - 0.01, max(lons) + 0.01)
+    ]
+
+    seen_names, used_rows = set(), set()
+
+    full_route = Route(word.upper())
+    full_route.stops.append(Stop('user', 'Your Location', config.USER_LAT, config.USER_LON))
+    start_station = _nearest_station(config.USER_LAT, config.USER_LON, youbike_df, station_grid)
+    full_route.stops.append(start_station)
+    used_rows.add(start_station.row)
+
+    for position, (letter, segments) in enumerate(placed):
+        group = f"{letter}{position + 1}"
+        print(f"--- Processing Letter: {letter} ({position + 1}/{len(placed)}) ---")
+        ordered = _ordered_attractions(segments, attraction_pool, seen_names, group=group)
+        if not ordered:
+            print(f"No attractions found along the path for letter {letter}.")
+            continue
+        selected_attractions = _downsample(ordered, max_attractions)
+
+        connected = False
+        for attraction_point in selected_attractions:
+            next_bike_station = _nearest_station(attraction_point.lat, attraction_point.lon, youbike_df, station_grid, exclude=used_rows)
+            if next_bike_station is None:
+                print("  - No unused stations left.")
+                break
+            biking_time = _leg_minutes(next_bike_station, attraction_point)
+
+            if biking_time <= config.MAX_BIKE_TIME_MINS:
+                # Reserve the station first so a relay cannot pick it as well
+                used_rows.add(next_bike_station.row)
+                if not connected:
+                    _connect(full_route, attraction_point, youbike_df, station_grid, used_rows)
+                    connected = True
+                print(f"  - Adding '{attraction_point.name}' to route (Bike time: {biking_time:.1f} mins)")
+                next_bike_station.group = group
+                full_route.stops.append(attraction_point)
+                full_route.stops.append(next_bike_station)
+            else:
+                print(f"  - Skipping '{attraction_point.name}' (Bike time: {biking_time:.1f} mins > {config.MAX_BIKE_TIME_MINS})")
+
+    return full_route
@@ -0,0 +1,75 @@
+# route_model.py
+
+
+class Stop:
+    """
+    A single stop on a route. 'kind' is 'user', 'ubike' or 'attraction';
+    'row' is the station's position in the YouBike snapshot it was planned from;
+    'group' tags the letter a stop belongs to in multi-letter routes.
+    """
+    __slots__ = ('kind', 'name', 'lat', 'lon', 'row', 'sno',
+                 'available_bikes', 'available_spaces', 'attractions', 'group')
+
+    def __init__(self, kind, name, lat, lon, row=None, sno=None,
+                 available_bikes=None, available_spaces=None, attractions=None, group=None):
+        self.kind = kind
+        self.name = name
+        self.lat = float(lat)
+        self.lon = float(lon)
+        self.row = row
+        self.sno = sno
+        self.available_bikes = available_bikes
+        self.available_spaces = available_spaces
+        self.attractions = attractions
+        self.group = group
+
+    def __repr__(self):
+        return f"Stop({self.kind!r}, {self.name!r}, {self.lat:.5f}, {self.lon:.5f})"
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class Route:
+    """
+    An ordered list of stops plus the shape it was planned for.
+    Cheap to cache and to serialize with to_dict()/from_dict().
+    """
+    __slots__ = ('shape', 'stops', 'similarity')
+
+    def __init__(self, shape, stops=None, similarity=0.0):
+        self.shape = shape
+        self.stops = stops if stops is not None else []
+        self.similarity = similarity
+
+    def __len__(self):
+        return len(self.stops)
+
+    def __iter__(self):
+        return iter(self.stops)
+
+    def __getitem__(self, index):
+        return self.stops[index]
+
+    def coords(self):
+        """Returns the stops as a list of (lat, lon) tuples."""
+        return [(stop.lat, stop.lon) for stop in self.stops]
+
+    def station_ids(self):
+        """Returns the sno of every YouBike stop on the route."""
+        return [stop.sno for stop in self.stops if stop.sno is not None]
+
+    def to_dict(self):
+        return {
+            'shape': self.shape,
+            'similarity': self.similarity,
+            'stops': [stop.to_dict() for stop in self.stops],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['shape'], [Stop.from_dict(s) for s in data['stops']], data['similarity'])
@@ -1,5 +1,6 @@
 # services.py
 import requests
+from distance_estimator import record_osrm_legs
 
 def fetch_youbike_data(api_url="https://tcgbusfs.blob.core.windows.net/dotapp/youbike/v2/youbike_immediate.json"):
     """
@@ -17,13 +18,13 @@ def fetch_youbike_data(api_url="https://tcgbusfs.blob.core.windows.net/dotapp/yo
 def get_osrm_route(points):
     """
     Gets a realistic biking route from the OSRM API for a sequence of points.
-    'points' should be a list of dicts with 'lat' and 'lon' keys.
+    'points' should be a sequence of route_model.Stop objects (anything with .lat/.lon).
     """
     if len(points) < 2:
         return None
     
     # OSRM expects coordinates as 'longitude,latitude'
-    coords_str = ";".join([f"{p['lon']},{p['lat']}" for p in points])
+    coords_str = ";".join([f"{p.lon},{p.lat}" for p in points])
     
     # Using the public OSRM demo server
     url = f"http://router.project-osrm.org/route/v1/bike/{coords_str}?geometries=geojson"
@@ -37,6 +38,7 @@ def get_osrm_route(points):
             # OSRM returns [lon, lat], but Folium needs [lat, lon], so we swap them.
             route_geometry = [[coord[1], coord[0]] for coord in data['routes'][0]['geometry']['coordinates']]
             print(f"  -> Successfully fetched OSRM route of length {len(route_geometry)} points.")
+            record_osrm_legs([(p.lat, p.lon) for p in points], data['routes'][0]['legs'])
             return route_geometry
     except requests.exceptions.RequestException as e:
         print(f"  -> OSRM API error: {e}")
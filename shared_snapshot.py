@@ -0,0 +1,218 @@
+# shared_snapshot.py
+import json
+import struct
+import time
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Published columns: output name -> (source DataFrame column, dtype).
+# Text columns are fixed-width; missing values are published as empty strings.
+STATION_COLUMNS = {
+    'sno': ('sno', 'S16'),
+    'name': ('sna', 'U64'),
+    'lat': ('latitude', 'float64'),
+    'lon': ('longitude', 'float64'),
+    'available_rent_bikes': ('available_rent_bikes', 'int32'),
+    'available_return_bikes': ('available_return_bikes', 'int32'),
+}
+ATTRACTION_COLUMNS = {
+    'name': ('name', 'U64'),
+    'name_zh': ('name_zh', 'U64'),
+    'address': ('address', 'U128'),
+    'lat': ('nlat', 'float64'),
+    'lon': ('elong', 'float64'),
+}
+
+# Control block layout: [sequence int64][manifest length uint32][manifest JSON]
+CONTROL_SIZE = 64 * 1024
+_HEADER = struct.Struct('<qI')
+
+
+def _attach(block_name):
+    """
+    Attaches to an existing block. Before Python 3.13 attaching always registers
+    the block with the resource tracker, which is harmless for pool workers since
+    they share the publishing process's tracker.
+    """
+    try:
+        return shared_memory.SharedMemory(name=block_name, track=False)  # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=block_name)
+
+
+class SnapshotPublisher:
+    """
+    Publishes the coordinate, availability, ID and name columns of each YouBike
+    and attraction snapshot into shared memory, once per snapshot.
+
+    Every version gets its own blocks; the control block holds a manifest of the
+    current version guarded by a sequence counter (odd while being written), so
+    readers always switch between complete versions. The previous version stays
+    attachable for readers that are still switching; older blocks are unlinked,
+    which frees them once every worker has dropped its arrays (see SnapshotView).
+    """
+
+    def __init__(self, name='route_algo', station_columns=STATION_COLUMNS,
+                 attraction_columns=ATTRACTION_COLUMNS):
+        self.name = name
+        self.version = 0
+        self._columns = {'stations': station_columns, 'attractions': attraction_columns}
+        self._blocks = {}  # version -> list of SharedMemory
+        self._control = shared_memory.SharedMemory(name=f"{name}_ctl", create=True, size=CONTROL_SIZE)
+        _HEADER.pack_into(self._control.buf, 0, 0, 0)
+
+    def publish(self, youbike_df, attractions_df):
+        """Copies the snapshot columns into new shared blocks and makes them current."""
+        version = self.version + 1
+        frames = {'stations': youbike_df, 'attractions': attractions_df}
+        manifest = {'version': version, 'tables': {}}
+        blocks = []
+
+        for table, columns in self._columns.items():
+            df = frames[table]
+            manifest['tables'][table] = {}
+            for column, (source, dtype) in columns.items():
+                text = np.dtype(dtype).kind in 'SU'
+                if source not in df.columns:
+                    # e.g. the bare DataFrame() used when the attractions CSV is missing
+                    values = np.full(len(df), '' if text else np.nan)
+                elif text:
+                    values = df[source].astype(object).where(df[source].notna(), '').to_numpy().astype(str)
+                else:
+                    values = df[source].to_numpy()
+                array = np.ascontiguousarray(values.astype(dtype))
+                shm = shared_memory.SharedMemory(
+                    name=f"{self.name}_v{version}_{table}_{column}",
+                    create=True,
+                    size=max(array.nbytes, 1),
+                )
+                np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+                blocks.append(shm)
+                manifest['tables'][table][column] = [shm.name, array.dtype.str, list(array.shape), source]
+
+        self._write_manifest(manifest)
+        self._blocks[version] = blocks
+        self.version = version
+
+        for old_version in [v for v in self._blocks if v < version - 1]:
+            self._release(old_version)
+        return version
+
+    def close(self):
+        """Unlinks every published block and the control block."""
+        for version in list(self._blocks):
+            self._release(version)
+        self._control.close()
+        self._control.unlink()
+
+    def _write_manifest(self, manifest):
+        payload = json.dumps(manifest).encode('utf-8')
+        if _HEADER.size + len(payload) > CONTROL_SIZE:
+            raise ValueError("Snapshot manifest does not fit in the control block.")
+        sequence, _ = _HEADER.unpack_from(self._control.buf, 0)
+        _HEADER.pack_into(self._control.buf, 0, sequence + 1, 0)  # odd: write in progress
+        self._control.buf[_HEADER.size:_HEADER.size + len(payload)] = payload
+        _HEADER.pack_into(self._control.buf, 0, sequence + 2, len(payload))
+
+    def _release(self, version):
+        for shm in self._blocks.pop(version):
+            shm.close()
+            shm.unlink()
+
+
+class SnapshotView:
+    """
+    Worker-side, zero-copy view of the snapshot published under 'name', meant
+    for worker processes started by the publisher.
+    Call refresh() between tasks to switch atomically to the latest version;
+    tables() then returns read-only NumPy arrays backed by shared memory.
+    Each block stays mapped until the last array (or view of one) handed out
+    for it is garbage collected, so arrays from an older version remain valid
+    after refresh() for as long as a caller holds them.
+    """
+
+    def __init__(self, name='route_algo'):
+        self.name = name
+        self._control = _attach(f"{name}_ctl")
+        self._current = (0, {}, {})  # (version, tables, sources), swapped as one object
+        self.refresh()
+
+    @property
+    def version(self):
+        return self._current[0]
+
+    def tables(self):
+        """Returns {'stations': {column: array}, 'attractions': {column: array}}."""
+        return self._current[1]
+
+    def frames(self):
+        """
+        Returns (youbike_df, attractions_df) under the source column names, for
+        the DataFrame-based pipeline. Numeric columns stay backed by shared
+        memory; text columns are decoded to Python strings (empty ones to None),
+        so build the frames once per version rather than per task.
+        """
+        _, tables, sources = self._current
+        frames = []
+        for table in ('stations', 'attractions'):
+            columns = {}
+            for column, array in tables.get(table, {}).items():
+                if array.dtype.kind in 'SU':
+                    values = array.astype(str).astype(object)
+                    values[values == ''] = None
+                    array = values
+                columns[sources[table][column]] = array
+            frames.append(pd.DataFrame(columns, copy=False))
+        return tuple(frames)
+
+    def refresh(self, retries=50):
+        """Attaches the latest published version. Returns True if the view switched."""
+        for _ in range(retries):
+            manifest = self._read_manifest()
+            if manifest is None:
+                time.sleep(0.001)
+                continue
+            if manifest['version'] == self.version:
+                return False
+            try:
+                tables, sources = self._attach_version(manifest)
+            except FileNotFoundError:
+                # The publisher moved on while we were attaching; read again
+                continue
+            # The previous version's blocks are closed by their arrays' finalizers
+            self._current = (manifest['version'], tables, sources)
+            return True
+        raise RuntimeError(f"Could not read a stable snapshot manifest for '{self.name}'.")
+
+    def close(self):
+        """Detaches from the control block; arrays still held by callers stay valid."""
+        self._current = (0, {}, {})
+        self._control.close()
+
+    def _read_manifest(self):
+        before, length = _HEADER.unpack_from(self._control.buf, 0)
+        if before % 2 or length == 0:
+            return None
+        payload = bytes(self._control.buf[_HEADER.size:_HEADER.size + length])
+        after, _ = _HEADER.unpack_from(self._control.buf, 0)
+        if after != before:
+            return None
+        return json.loads(payload)
+
+    def _attach_version(self, manifest):
+        tables, sources = {}, {}
+        for table, columns in manifest['tables'].items():
+            tables[table], sources[table] = {}, {}
+            for column, (block_name, dtype, shape, source) in columns.items():
+                shm = _attach(block_name)
+                array = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=shm.buf)
+                array.flags.writeable = False
+                # The array does not pin the mapping (closing it would not raise),
+                # so unmap only once the array and every view of it are gone
+                weakref.finalize(array, shm.close)
+                tables[table][column] = array
+                sources[table][column] = source
+        return tables, sources
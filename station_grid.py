@@ -0,0 +1,179 @@
+# station_grid.py
+import copy
+import math
+
+import numpy as np
+
+import utils
+from projection import TAIPEI_FRAME
+
+
+class StationGrid:
+    """
+    Fixed-size cell lookup table for nearest-station queries over Taipei.
+
+    For every cell and availability threshold the grid keeps the short list of
+    eligible stations that can be the nearest one to some point inside the cell,
+    plus a cutoff distance beyond which no unlisted station can win. A lookup is
+    one cell index followed by a haversine refine over that list.
+    """
+
+    def __init__(self, stations_df, thresholds=(0, 3), cell_deg=0.005,
+                 lat_col='latitude', lon_col='longitude', bikes_col='available_rent_bikes',
+                 bounds=None, margin_deg=0.02, slack_km=0.05, frame=TAIPEI_FRAME):
+        self.thresholds = tuple(sorted(set(thresholds)))
+        self.cell_deg = cell_deg
+        self.bikes_col = bikes_col
+        self.slack_km = slack_km
+
+        self._lat = stations_df[lat_col].to_numpy(dtype=float)
+        self._lon = stations_df[lon_col].to_numpy(dtype=float)
+        self._bikes = stations_df[bikes_col].to_numpy(dtype=int).copy()
+
+        if bounds is None:
+            bounds = (
+                self._lat.min() - margin_deg, self._lat.max() + margin_deg,
+                self._lon.min() - margin_deg, self._lon.max() + margin_deg,
+            )
+        self.min_lat, self.max_lat, self.min_lon, self.max_lon = bounds
+        self.n_rows = max(1, int(math.ceil((self.max_lat - self.min_lat) / cell_deg)))
+        self.n_cols = max(1, int(math.ceil((self.max_lon - self.min_lon) / cell_deg)))
+
+        # Stations and cell boxes in the shared metric frame (km) bound the candidate lists per cell
+        self._x, self._y = (v / 1000 for v in frame.to_local(self._lat, self._lon))
+
+        rows, cols = np.divmod(np.arange(self.n_rows * self.n_cols), self.n_cols)
+        self._cell_x0, self._cell_y0 = (v / 1000 for v in frame.to_local(self.min_lat + rows * cell_deg, self.min_lon + cols * cell_deg))
+        self._cell_x1, self._cell_y1 = (v / 1000 for v in frame.to_local(self.min_lat + (rows + 1) * cell_deg, self.min_lon + (cols + 1) * cell_deg))
+
+        n_cells = self.n_rows * self.n_cols
+        self._cells = {t: [None] * n_cells for t in self.thresholds}
+        self._cutoff = {t: np.zeros(n_cells) for t in self.thresholds}
+        for threshold in self.thresholds:
+            self._build(threshold, np.arange(n_cells))
+
+    def nearest(self, lat, lon, min_bikes=0, exclude=None):
+        """
+        Returns (row position, distance_km) of the nearest station with at least
+        min_bikes bikes, skipping positions in 'exclude'. Returns None if no
+        station qualifies. Falls back to a full scan for points outside the grid,
+        thresholds the grid was not built for, or when exclusions empty a cell.
+        """
+        cell_id = self._cell_id(lat, lon)
+        if cell_id is None or min_bikes not in self._cells:
+            return self._scan(lat, lon, min_bikes, exclude)
+
+        candidates = self._cells[min_bikes][cell_id]
+        if exclude:
+            candidates = candidates[~np.isin(candidates, list(exclude))]
+        if candidates.size == 0:
+            return self._scan(lat, lon, min_bikes, exclude)
+
+        distances = utils.haversine_array(lat, lon, self._lat[candidates], self._lon[candidates])
+        best = int(np.argmin(distances))
+        if exclude and distances[best] > self._cutoff[min_bikes][cell_id]:
+            # The excluded stations covered this cell; an unlisted one may be closer
+            return self._scan(lat, lon, min_bikes, exclude)
+        return int(candidates[best]), float(distances[best])
+
+    def copy(self):
+        """
+        Returns a grid that shares the static geometry with this one but has its
+        own availability and candidate lists, so it can be updated while this
+        grid keeps serving lookups.
+        """
+        clone = copy.copy(self)
+        clone._bikes = self._bikes.copy()
+        clone._cells = {t: list(cells) for t, cells in self._cells.items()}
+        clone._cutoff = {t: cutoff.copy() for t, cutoff in self._cutoff.items()}
+        return clone
+
+    def update_availability(self, position, bikes):
+        """
+        Records a new bike count for the station at 'position' and rebuilds only
+        the cells whose candidate lists can change for the affected thresholds.
+        """
+        self._apply(np.array([position]), np.array([bikes]))
+
+    def update_from_snapshot(self, stations_df):
+        """
+        Applies the availability of a refreshed snapshot with the same station
+        layout (same rows in the same order). All changed stations are applied
+        together, so every affected cell is rebuilt once per threshold.
+        """
+        bikes = stations_df[self.bikes_col].to_numpy(dtype=int)
+        if len(bikes) != len(self._bikes):
+            raise ValueError("Station layout changed; build a new StationGrid instead.")
+        changed = np.flatnonzero(bikes != self._bikes)
+        if changed.size:
+            self._apply(changed, bikes[changed])
+
+    def _apply(self, positions, bikes):
+        old_bikes = self._bikes[positions]
+        self._bikes[positions] = bikes
+        all_cells = np.arange(self.n_rows * self.n_cols)
+
+        for threshold in self.thresholds:
+            crossed = positions[(old_bikes >= threshold) != (bikes >= threshold)]
+            if crossed.size == 0:
+                continue
+            # Both when joining and leaving, only cells within the (old) cutoff care
+            d_min = self._box_distances(self._x[crossed], self._y[crossed], all_cells)[0]
+            affected = np.flatnonzero((d_min <= self._cutoff[threshold][:, None]).any(axis=1))
+            self._build(threshold, affected)
+
+    def _cell_id(self, lat, lon):
+        row = int((lat - self.min_lat) // self.cell_deg)
+        col = int((lon - self.min_lon) // self.cell_deg)
+        if not (0 <= row < self.n_rows and 0 <= col < self.n_cols):
+            return None
+        return row * self.n_cols + col
+
+    def _box_distances(self, x, y, cell_ids=None):
+        """Min and max planar distances (km) from points (x, y) to each cell box."""
+        if cell_ids is None:
+            cell_ids = slice(None)
+        x0, x1 = self._cell_x0[cell_ids, None], self._cell_x1[cell_ids, None]
+        y0, y1 = self._cell_y0[cell_ids, None], self._cell_y1[cell_ids, None]
+        x, y = np.atleast_1d(x)[None, :], np.atleast_1d(y)[None, :]
+
+        dx_min = np.maximum(np.maximum(x0 - x, x - x1), 0)
+        dy_min = np.maximum(np.maximum(y0 - y, y - y1), 0)
+        dx_max = np.maximum(np.abs(x - x0), np.abs(x - x1))
+        dy_max = np.maximum(np.abs(y - y0), np.abs(y - y1))
+        d_min = np.hypot(dx_min, dy_min)
+        d_max = np.hypot(dx_max, dy_max)
+        if isinstance(cell_ids, slice):
+            return d_min[:, 0], d_max[:, 0]
+        return d_min, d_max
+
+    def _build(self, threshold, cell_ids, chunk_size=64):
+        eligible = np.flatnonzero(self._bikes >= threshold)
+        cells, cutoff = self._cells[threshold], self._cutoff[threshold]
+        if eligible.size == 0:
+            for cell_id in cell_ids:
+                cells[cell_id] = eligible
+                cutoff[cell_id] = np.inf
+            return
+
+        ex, ey = self._x[eligible], self._y[eligible]
+        for start in range(0, len(cell_ids), chunk_size):
+            chunk = cell_ids[start:start + chunk_size]
+            d_min, d_max = self._box_distances(ex, ey, chunk)
+            # No station farther than the best worst-case distance can be nearest
+            bounds = d_max.min(axis=1) + self.slack_km
+            for i, cell_id in enumerate(chunk):
+                keep = np.flatnonzero(d_min[i] <= bounds[i])
+                cells[cell_id] = eligible[keep[np.argsort(d_min[i][keep])]]
+                cutoff[cell_id] = bounds[i]
+
+    def _scan(self, lat, lon, min_bikes, exclude):
+        mask = self._bikes >= min_bikes
+        if exclude:
+            mask[list(exclude)] = False
+        positions = np.flatnonzero(mask)
+        if positions.size == 0:
+            return None
+        distances = utils.haversine_array(lat, lon, self._lat[positions], self._lon[positions])
+        best = int(np.argmin(distances))
+        return int(positions[best]), float(distances[best])
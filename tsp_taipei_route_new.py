@@ -26,9 +26,41 @@ import numpy as np
 import math
 import json
 import argparse
+import time
+import contextlib
+import contextvars
+from functools import lru_cache
 from scipy.interpolate import interp1d
 import geocoder
 
+import data_loader
+from config import TAIPEI_BBOX
+from route_cache import RouteCache, snapshot_version
+from route_model import Route, Stop
+from profiling import maybe_profile
+from availability_predictor import AvailabilityPredictor
+from distance_estimator import default_estimator, record_osrm_legs
+from projection import TAIPEI_FRAME, affine
+
+# ===================================================================
+# 進度輸出（函式庫呼叫端可用 quiet() 關閉，只影響目前的執行緒/context）
+# ===================================================================
+_quiet = contextvars.ContextVar('quiet', default=False)
+
+def log(*args, **kwargs):
+    """輸出規劃進度；在 quiet() 區塊內不輸出"""
+    if not _quiet.get():
+        print(*args, **kwargs)
+
+@contextlib.contextmanager
+def quiet():
+    """在此區塊內（僅限目前執行緒）不輸出規劃進度"""
+    token = _quiet.set(True)
+    try:
+        yield
+    finally:
+        _quiet.reset(token)
+
 # ===================================================================
 # 配置參數類別
 # ===================================================================
@@ -46,6 +78,9 @@ class RouteConfig:
         self.max_segment_distance = 3.0  # 公里 
         self.cycling_speed = 10  # km/h
         
+        # 圖形模板旋轉角度（度，逆時針）
+        self.template_rotation = 0
+        
         # YouBike 站點篩選
         self.min_available_bikes = 3
         self.min_available_spaces = 2
@@ -158,7 +193,7 @@ def get_user_location_auto():
 
 def fetch_youbike_data():
     """抓取 YouBike 2.0 即時資料"""
-    print("🚲 正在抓取 YouBike 即時資料...")
+    log("🚲 正在抓取 YouBike 即時資料...")
     url = "https://tcgbusfs.blob.core.windows.net/dotapp/youbike/v2/youbike_immediate.json"
     data = requests.get(url).json()
     df = pd.DataFrame(data)
@@ -173,20 +208,83 @@ def fetch_youbike_data():
     # 移除無效的座標
     df = df.dropna(subset=['latitude', 'longitude'])
     
-    print(f"✅ 獲取 {len(df)} 個 YouBike 站點")
+    log(f"✅ 獲取 {len(df)} 個 YouBike 站點")
     return df
 
 def fetch_attractions_from_csv():
-    """從本地 CSV 讀取景點資料"""
-    print("🏛️ 正在讀取台北景點資料...")
+    """從本地 CSV 讀取景點資料（只讀需要的欄位，結果以 mtime 快取）"""
+    log("🏛️ 正在讀取台北景點資料...")
     try:
-        df = pd.read_csv("taipei_attractions.csv")
-        df = df[pd.notna(df['nlat']) & pd.notna(df['elong'])]
-        print(f"✅ 讀取 {len(df)} 個景點")
-        return df
+        df = data_loader.load_attractions("taipei_attractions.csv", bbox=TAIPEI_BBOX, missing_ok=False)
     except FileNotFoundError:
-        print("❌ 找不到 taipei_attractions.csv")
+        log("❌ 找不到 taipei_attractions.csv")
         return pd.DataFrame()
+    if df.empty:
+        log("⚠️ taipei_attractions.csv 在台北範圍內沒有可用的景點")
+        return df
+    log(f"✅ 讀取 {len(df)} 個景點")
+    return df
+
+# ===================================================================
+# 站點快照（NumPy 欄位）
+# ===================================================================
+class StationSnapshot:
+    """YouBike 快照的 NumPy 欄位（含公尺座標 x/y）、sno→列索引，以及各門檻的可用旗標（每個快照建立一次）"""
+    def __init__(self, youbike_df, frame=TAIPEI_FRAME):
+        self.df = youbike_df
+        self.frame = frame
+        self.lat = youbike_df['latitude'].to_numpy(dtype=float)
+        self.lon = youbike_df['longitude'].to_numpy(dtype=float)
+        self.x, self.y = frame.to_local(self.lat, self.lon)
+        self.rent = youbike_df['available_rent_bikes'].to_numpy()
+        self.ret = youbike_df['available_return_bikes'].to_numpy()
+        self.sno = youbike_df['sno'].to_numpy()
+        self.name = youbike_df['sna'].to_numpy()
+        self.sno_to_row = {sno: row for row, sno in enumerate(self.sno)}
+        self.version = snapshot_version(youbike_df)
+        self._x_order = np.argsort(self.x, kind='stable')
+        self._x_sorted = self.x[self._x_order]
+        self._eligible = {}
+        self._predictor_rows = {}
+    
+    def __len__(self):
+        return len(self.sno)
+    
+    def eligible(self, min_bikes, min_spaces):
+        """可借車輛與可還空位皆達門檻的站點旗標（依門檻快取）"""
+        key = (min_bikes, min_spaces)
+        if key not in self._eligible:
+            self._eligible[key] = (self.rent >= min_bikes) & (self.ret >= min_spaces)
+        return self._eligible[key]
+    
+    def predictor_rows(self, predictor):
+        """各站點在預測模型中的列索引（依模型快取）"""
+        key = id(predictor)
+        if key not in self._predictor_rows:
+            self._predictor_rows[key] = predictor.rows_for(self.sno)
+        return self._predictor_rows[key]
+    
+    def distances_from(self, lat, lon):
+        """所有站點到指定座標的距離（公里，於公尺座標系計算）"""
+        x, y = self.frame.to_local(lat, lon)
+        return self.frame.distance_km(x, y, self.x, self.y)
+    
+    def rows_within(self, lat, lon, radius_km):
+        """
+        半徑內站點的列索引（遞增）與距離（公里）；
+        先以依 x 排序的索引取出東西向範圍內的站點，只對這些站點計算距離
+        """
+        x, y = self.frame.to_local(lat, lon)
+        lo, hi = np.searchsorted(self._x_sorted, [x - radius_km * 1000, x + radius_km * 1000], side='left')
+        rows = np.sort(self._x_order[lo:hi])
+        distances = self.frame.distance_km(x, y, self.x[rows], self.y[rows])
+        inside = distances <= radius_km
+        return rows[inside], distances[inside]
+    
+    def stop(self, row):
+        """以快照列索引建立 Stop"""
+        return Stop('ubike', self.name[row], self.lat[row], self.lon[row], row=int(row), sno=self.sno[row],
+                    available_bikes=int(self.rent[row]), available_spaces=int(self.ret[row]))
 
 # ===================================================================
 # 位置與距離計算
@@ -202,10 +300,20 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
     return R * c
 
-def find_nearest_youbike(user_lat, user_lon, youbike_df, min_bikes=3):
-    """找最近的 YouBike 站點"""
-    print(f"\n🔍 尋找最近的 YouBike 站點...")
-    print(f"   使用者位置: ({user_lat:.4f}, {user_lon:.4f})")
+def find_nearest_youbike(user_lat, user_lon, youbike_df, min_bikes=3, grid=None):
+    """找最近的 YouBike 站點（提供 StationGrid 時以格網查表取代全表掃描）"""
+    log(f"\n🔍 尋找最近的 YouBike 站點...")
+    log(f"   使用者位置: ({user_lat:.4f}, {user_lon:.4f})")
+    
+    if grid is not None:
+        found = grid.nearest(user_lat, user_lon, min_bikes) or grid.nearest(user_lat, user_lon, 0)
+        position, distance = found
+        nearest = youbike_df.iloc[position].copy()
+        nearest['distance'] = distance
+        log(f"✅ 找到: {nearest['sna']}")
+        log(f"   距離: {nearest['distance']*1000:.0f} 公尺")
+        log(f"   可借: {nearest['available_rent_bikes']} 輛")
+        return nearest
     
     available_stations = youbike_df[youbike_df['available_rent_bikes'] >= min_bikes].copy()
     if len(available_stations) == 0:
@@ -217,9 +325,9 @@ def find_nearest_youbike(user_lat, user_lon, youbike_df, min_bikes=3):
     )
     
     nearest = available_stations.nsmallest(1, 'distance').iloc[0]
-    print(f"✅ 找到: {nearest['sna']}")
-    print(f"   距離: {nearest['distance']*1000:.0f} 公尺")
-    print(f"   可借: {nearest['available_rent_bikes']} 輛")
+    log(f"✅ 找到: {nearest['sna']}")
+    log(f"   距離: {nearest['distance']*1000:.0f} 公尺")
+    log(f"   可借: {nearest['available_rent_bikes']} 輛")
     
     return nearest
 
@@ -227,41 +335,74 @@ def calculate_ride_time(distance_km, speed_kmh=12):
     """計算騎行時間（分鐘）"""
     return (distance_km / speed_kmh) * 60
 
-def filter_youbike_by_time(youbike_df, center_lat, center_lon, max_time_min=20, speed_kmh=12):
-    """篩選在騎行時間內的站點"""
-    max_distance_km = (max_time_min / 60) * speed_kmh
+def candidate_rows(snapshot, center_lat, center_lon, config, filter_availability=True, estimator=None):
+    """
+    篩選騎行時間內且車輛/空位達門檻的站點，回傳快照列索引陣列。
+    騎行時間以 OSRM 校正的距離估計器計算（未校正時等同直線距離 / 騎行速度）；
+    只有估計器可能判定在時間內的距離範圍（max_straight_km）內的站點才會估計，
+    因此暫存陣列的大小隨範圍內站點數，而非全部站點數。
+    filter_availability=False 時只依騎行時間篩選（使用預測模型時，可用數量改在
+    排定站點順序後依「預計抵達時間」檢查，見 _arrival_check）。
+    """
+    if estimator is None:
+        estimator = default_estimator()
     
-    youbike_df = youbike_df.copy()
-    youbike_df['distance_from_center'] = youbike_df.apply(
-        lambda row: haversine_distance(center_lat, center_lon, row['latitude'], row['longitude']),
-        axis=1
-    )
-    
-    youbike_df['ride_time'] = youbike_df['distance_from_center'].apply(
-        lambda d: calculate_ride_time(d, speed_kmh)
+    reach_km = estimator.max_straight_km(config.max_segment_time, config.cycling_speed)
+    rows, distances = snapshot.rows_within(center_lat, center_lon, reach_km)
+    _, ride_minutes = estimator.estimate_array(
+        center_lat, center_lon, snapshot.lat[rows], snapshot.lon[rows], distances, config.cycling_speed
     )
+    keep = ride_minutes <= config.max_segment_time
+    log(f"   篩選結果: {np.count_nonzero(keep)}/{len(snapshot)} 個站點")
     
-    filtered = youbike_df[youbike_df['ride_time'] <= max_time_min].copy()
-    print(f"   篩選結果: {len(filtered)}/{len(youbike_df)} 個站點")
+    if filter_availability:
+        keep &= snapshot.eligible(config.min_available_bikes, config.min_available_spaces)[rows]
+    return rows[keep]
+
+def _arrival_check(snapshot, config, predictor, now, estimator):
+    """
+    回傳 check(prev_row, rows, elapsed)：從 prev_row 騎到各 rows 站點後的累計分鐘數陣列
+    （一次向量化估計、一次預測）；預測在該時刻可借車輛或可還空位低於門檻的站點為 NaN
+    """
+    model_rows = snapshot.predictor_rows(predictor)
     
-    return filtered
+    def check(prev_row, rows, elapsed):
+        _, minutes = estimator.estimate_array(
+            snapshot.lat[prev_row], snapshot.lon[prev_row], snapshot.lat[rows], snapshot.lon[rows],
+            default_speed_kmh=config.cycling_speed
+        )
+        arrival = elapsed + minutes
+        rent, ret = predictor.predict(model_rows[rows], snapshot.rent[rows], snapshot.ret[rows], now, arrival)
+        ok = (rent >= config.min_available_bikes) & (ret >= config.min_available_spaces)
+        return np.where(ok, arrival, np.nan)
+    return check
 
-def find_nearby_attractions(lat, lon, attractions_df, radius_meters=300):
-    """找附近景點"""
-    nearby = []
+def project_attractions(attractions_df, frame=TAIPEI_FRAME):
+    """將景點座標投影到公尺座標系，回傳 (x, y) 陣列（每份景點資料只需一次；沒有景點資料時為空陣列）"""
+    if attractions_df.empty or not {'nlat', 'elong'} <= set(attractions_df.columns):
+        return np.empty(0), np.empty(0)
+    return frame.to_local(attractions_df['nlat'].to_numpy(dtype=float), attractions_df['elong'].to_numpy(dtype=float))
+
+def find_nearby_attractions(lat, lon, attractions_df, radius_meters=300, projected=None):
+    """找附近景點（可傳入 project_attractions 的結果，避免重複投影）"""
+    if projected is None:
+        projected = project_attractions(attractions_df)
+    x, y = TAIPEI_FRAME.to_local(lat, lon)
+    distances = np.hypot(projected[0] - x, projected[1] - y)
+    rows = np.flatnonzero(distances <= radius_meters)
     
-    for _, attraction in attractions_df.iterrows():
-        distance = haversine_distance(lat, lon, attraction['nlat'], attraction['elong']) * 1000
-        if distance <= radius_meters:
-            nearby.append({
-                'name': attraction.get('name', '未知景點'),
-                'address': attraction.get('address', '無地址'),
-                'distance': distance,
-                'lat': attraction['nlat'],
-                'lon': attraction['elong']
-            })
-    
-    nearby.sort(key=lambda x: x['distance'])
+    nearby = []
+    for row in rows[np.argsort(distances[rows], kind='stable')]:
+        attraction = attractions_df.iloc[row]
+        name, address = attraction.get('name'), attraction.get('address')
+        # 座標以 float32 載入，轉成 Python float 才能直接 json 序列化
+        nearby.append({
+            'name': name if pd.notna(name) else '未知景點',
+            'address': address if pd.notna(address) else '無地址',
+            'distance': float(distances[row]),
+            'lat': float(attraction['nlat']),
+            'lon': float(attraction['elong'])
+        })
     return nearby
 
 # ===================================================================
@@ -300,125 +441,383 @@ def shape_similarity(coords1, coords2):
     similarity = 1 - np.mean(distances)
     return max(0, similarity)
 
-def scale_template_to_geography(template, center_lat, center_lon, max_distance_km):
-    """縮放模板到實際地理座標"""
-    lat_per_km = 1 / 111
-    lon_per_km = 1 / (111 * math.cos(math.radians(center_lat)))
+def _template_to_meters(template, scale_m, rotation_deg):
+    """模板點相對模板中心的公尺偏移 (x=東, y=北)；模板第 0 欄對應南北、第 1 欄對應東西"""
+    centered = template - template.mean(axis=0)
+    return affine(centered[:, ::-1], scale_m, rotation_deg)
+
+@lru_cache(maxsize=256)
+def template_offsets(shape, scale_m, rotation_deg=0):
+    """SHAPE_TEMPLATES 中圖形的公尺偏移，依 (圖形, 尺度, 旋轉) 快取；回傳唯讀陣列"""
+    offsets = _template_to_meters(SHAPE_TEMPLATES[shape], scale_m, rotation_deg)
+    offsets.flags.writeable = False
+    return offsets
+
+def _shape_candidates(snapshot, start_station, config, predictor=None, now=None, estimator=None):
+    """
+    篩選候選站點並決定起始站點，回傳 (候選列索引, 起始列索引, 抵達檢查)；站點不足時回傳 None。
+    未提供 predictor 時抵達檢查為 None（候選站點已依目前可用數量篩選）。
+    """
+    if estimator is None:
+        estimator = default_estimator()
+    candidates = candidate_rows(
+        snapshot,
+        start_station['latitude'],
+        start_station['longitude'],
+        config,
+        predictor is None,
+        estimator
+    )
     
-    template_center = template.mean(axis=0)
-    scale = max_distance_km * 2
+    log(f"   可用站點: {len(candidates)} 個")
     
-    scaled = []
-    for point in template:
-        offset_y = (point[0] - template_center[0]) * scale * lat_per_km
-        offset_x = (point[1] - template_center[1]) * scale * lon_per_km
-        new_lat = center_lat + offset_y
-        new_lon = center_lon + offset_x
-        scaled.append([new_lat, new_lon])
+    if len(candidates) < 4:
+        log(f"⚠️ 可用站點不足")
+        return None
+    
+    # 首先加入起始站點（確保從使用者附近開始；出發時就要有車可借，以目前數量判斷）
+    startable = candidates
+    if predictor is not None:
+        startable = candidates[snapshot.eligible(config.min_available_bikes, config.min_available_spaces)[candidates]]
+        if len(startable) == 0:
+            log(f"⚠️ 附近沒有可借車的起始站點")
+            return None
+    start_row = snapshot.sno_to_row.get(start_station['sno'])
+    if start_row is not None and start_row in startable:
+        log(f"   ✅ 起始站點: {start_station['sna']}")
+    else:
+        # 如果起始站點不在候選列表中，找最近的候選站點作為起始點
+        x, y = snapshot.frame.to_local(start_station['latitude'], start_station['longitude'])
+        start_row = int(startable[np.argmin(snapshot.frame.distance_km(x, y, snapshot.x[startable], snapshot.y[startable]))])
+        log(f"   ✅ 起始站點（替代）: {snapshot.name[start_row]}")
     
-    return np.array(scaled)
+    check = None
+    if predictor is not None:
+        check = _arrival_check(snapshot, config, predictor, time.time() if now is None else now, estimator)
+    return candidates, start_row, check
+
+def _nearest_candidates(snapshot, candidates, template_x, template_y, keep=10):
+    """一次計算所有模板點到候選站點的距離，每個模板點保留最近的 keep 個（候選陣列索引）"""
+    squared = (template_x[:, None] - snapshot.x[candidates]) ** 2 + (template_y[:, None] - snapshot.y[candidates]) ** 2
+    return np.argsort(squared, axis=1, kind='stable')[:, :keep]
+
+def _assign_stations(candidates, start_row, nearest, check=None):
+    """
+    依模板點順序為每個點挑選最近且未使用的站點，回傳快照列索引清單。
+    提供 check（見 _arrival_check）時，沿已選順序累計騎行時間，每個模板點的未使用最近站點
+    一次檢查，取第一個預計抵達時可用數量足夠的站點。
+    """
+    selected_rows = [start_row]
+    used_rows = {start_row}
+    elapsed = 0.0
+    for template_nearest in nearest:
+        rows = [row for row in candidates[template_nearest].tolist() if row not in used_rows]
+        if not rows:
+            continue
+        if check is None:
+            row = rows[0]
+        else:
+            arrivals = check(selected_rows[-1], rows, elapsed)
+            passing = np.flatnonzero(~np.isnan(arrivals))
+            if len(passing) == 0:
+                continue
+            row, elapsed = rows[passing[0]], float(arrivals[passing[0]])
+        selected_rows.append(row)
+        used_rows.add(row)
+    return selected_rows
+
+def _build_route(snapshot, target_shape, selected_rows, template_x, template_y):
+    """以列索引建立 Route 並計算與（已縮放、旋轉）模板的形狀相似度"""
+    route = Route(target_shape, [snapshot.stop(row) for row in selected_rows])
+    actual_coords = np.array(route.coords())
+    template_lat, template_lon = snapshot.frame.to_geo(template_x, template_y)
+    route.similarity = shape_similarity(actual_coords, np.column_stack([template_lat, template_lon]))
+    return route
 
-def generate_shape_route(youbike_df, start_station, target_shape, config):
-    """生成圖形路線"""
-    print(f"\n🎨 生成 '{target_shape}' 形狀路線...")
+def generate_shape_route(youbike_df, start_station, target_shape, config, snapshot=None, predictor=None, now=None):
+    """生成圖形路線（候選站點以布林遮罩篩選，只配置一個索引陣列；可選用抵達時可用數量預測）"""
+    log(f"\n🎨 生成 '{target_shape}' 形狀路線...")
     
     if target_shape not in SHAPE_TEMPLATES:
-        print(f"⚠️ 不支援的圖形: {target_shape}")
-        return None, 0
+        log(f"⚠️ 不支援的圖形: {target_shape}")
+        return None
     
-    template = SHAPE_TEMPLATES[target_shape]
+    if snapshot is None:
+        snapshot = StationSnapshot(youbike_df)
     
     # 篩選可用站點
-    candidates = filter_youbike_by_time(
-        youbike_df, 
-        start_station['latitude'], 
-        start_station['longitude'],
-        config.max_segment_time,
-        config.cycling_speed
-    )
+    found = _shape_candidates(snapshot, start_station, config, predictor, now)
+    if found is None:
+        return None
+    candidates, start_row, check = found
     
-    candidates = candidates[
-        (candidates['available_rent_bikes'] >= config.min_available_bikes) &
-        (candidates['available_return_bikes'] >= config.min_available_spaces)
-    ].copy()
+    # 縮放、旋轉模板（公尺座標系，偏移量依圖形/尺度/角度快取）
+    center_x, center_y = snapshot.frame.to_local(start_station['latitude'], start_station['longitude'])
+    offsets = template_offsets(target_shape, config.max_segment_distance * 2000, config.template_rotation)
+    template_x = center_x + offsets[:, 0]
+    template_y = center_y + offsets[:, 1]
     
-    print(f"   可用站點: {len(candidates)} 個")
+    # 為每個模板點找最近的站點（只記錄快照列索引，最後一次建立 Stop）
+    nearest = _nearest_candidates(snapshot, candidates, template_x, template_y)
+    selected_rows = _assign_stations(candidates, start_row, nearest, check)
+    route = _build_route(snapshot, target_shape, selected_rows, template_x, template_y)
     
-    if len(candidates) < 4:
-        print(f"⚠️ 可用站點不足")
-        return None, 0
+    log(f"✅ 路線生成完成")
+    log(f"   路線點數: {len(route)}")
+    log(f"   形狀相似度: {route.similarity:.2%}")
     
-    # 縮放模板
-    template_scaled = scale_template_to_geography(
-        template, 
-        start_station['latitude'], 
-        start_station['longitude'],
-        config.max_segment_distance
-    )
+    return route
+
+# 替代路線：模板依不同旋轉角度與尺度套用，以綜合分數排序
+# 第一個組合（旋轉 +0°、尺度 ×1.0）即使用者設定的模板，一定列入結果
+ALTERNATIVE_ROTATIONS = (0, -15, 15, -30, 30)  # 相對 config.template_rotation（度）
+ALTERNATIVE_SCALES = (1.0, 0.8, 1.2)           # 相對 config.max_segment_distance
+ALTERNATIVE_WEIGHTS = {'similarity': 0.5, 'time': 0.25, 'coverage': 0.25}
+MAX_ALTERNATIVE_OVERLAP = 0.6  # 任兩條路線站點集合（不含起點）的 Jaccard 上限
+
+def generate_shape_alternatives(youbike_df, start_station, target_shape, config, k=3, snapshot=None, predictor=None,
+                                now=None, attractions_xy=None, estimator=None):
+    """
+    一次產生前 k 條彼此不同的圖形路線，回傳 [(Route, 指標 dict)]（分數由高到低）。
+    候選站點與起點只算一次；所有旋轉/尺度變體的模板點合併成一個距離矩陣一起排序；
+    各變體共用騎行時間與景點覆蓋的查表結果。
+    分數 = 相似度、騎行效率（每公里模板長度的騎行分鐘數，相對最佳者；不因尺度較小而占優）
+    與景點覆蓋率（有景點的站點比例）的加權和。使用者設定的模板一定列入結果，其餘依分數挑選，
+    與已選路線的站點重疊（Jaccard）超過 MAX_ALTERNATIVE_OVERLAP 的變體會被略過。
+    """
+    log(f"\n🎨 生成 '{target_shape}' 形狀路線（前 {k} 條替代路線）...")
     
-    # 為每個模板點找最近的站點
-    selected_stations = []
-    used_indices = set()
-    
-    # 首先加入起始站點（確保從使用者附近開始）
-    start_idx = None
-    for idx in candidates.index:
-        if (candidates.loc[idx]['sno'] == start_station['sno']):
-            selected_stations.append(candidates.loc[idx])
-            used_indices.add(idx)
-            start_idx = idx
-            print(f"   ✅ 起始站點: {start_station['sna']}")
-            break
+    if target_shape not in SHAPE_TEMPLATES:
+        log(f"⚠️ 不支援的圖形: {target_shape}")
+        return []
+    
+    if snapshot is None:
+        snapshot = StationSnapshot(youbike_df)
+    if estimator is None:
+        estimator = default_estimator()
+    
+    found = _shape_candidates(snapshot, start_station, config, predictor, now, estimator)
+    if found is None:
+        return []
+    candidates, start_row, check = found
     
-    # 如果起始站點不在候選列表中，找最近的候選站點作為起始點
-    if start_idx is None:
-        distances_from_start = candidates.apply(
-            lambda row: haversine_distance(
-                start_station['latitude'], start_station['longitude'],
-                row['latitude'], row['longitude']
-            ),
-            axis=1
+    # 所有變體的模板點一次排序
+    center_x, center_y = snapshot.frame.to_local(start_station['latitude'], start_station['longitude'])
+    variants = [
+        (config.template_rotation + rotation, scale)
+        for scale in ALTERNATIVE_SCALES for rotation in ALTERNATIVE_ROTATIONS
+    ]
+    offsets = [template_offsets(target_shape, config.max_segment_distance * 2000 * scale, rotation)
+               for rotation, scale in variants]
+    all_offsets = np.vstack(offsets)
+    nearest = _nearest_candidates(snapshot, candidates, center_x + all_offsets[:, 0], center_y + all_offsets[:, 1])
+    
+    leg_minutes, has_attractions = {}, {}
+    
+    def ride_minutes(rows):
+        total = 0.0
+        for a, b in zip(rows, rows[1:]):
+            if (a, b) not in leg_minutes:
+                leg_minutes[a, b] = estimator.estimate(
+                    snapshot.lat[a], snapshot.lon[a], snapshot.lat[b], snapshot.lon[b], config.cycling_speed
+                )[1]
+            total += leg_minutes[a, b]
+        return total
+    
+    def coverage(rows):
+        if attractions_xy is None:
+            return 0.0
+        for row in rows:
+            if row not in has_attractions:
+                distances = np.hypot(attractions_xy[0] - snapshot.x[row], attractions_xy[1] - snapshot.y[row])
+                has_attractions[row] = bool((distances <= config.attraction_radius).any())
+        return sum(has_attractions[row] for row in rows) / len(rows)
+    
+    scored, seen = [], set()
+    first = 0
+    for (rotation, scale), variant_offsets in zip(variants, offsets):
+        last = first + len(variant_offsets)
+        rows = _assign_stations(candidates, start_row, nearest[first:last], check)
+        first = last
+        if tuple(rows) in seen:
+            continue
+        seen.add(tuple(rows))
+        route = _build_route(
+            snapshot, target_shape, rows, center_x + variant_offsets[:, 0], center_y + variant_offsets[:, 1]
         )
-        start_idx = distances_from_start.idxmin()
-        selected_stations.append(candidates.loc[start_idx])
-        used_indices.add(start_idx)
-        print(f"   ✅ 起始站點（替代）: {candidates.loc[start_idx]['sna']}")
-    
-    for template_point in template_scaled:
-        distances = candidates.apply(
-            lambda row: haversine_distance(
-                template_point[0], template_point[1],
-                row['latitude'], row['longitude']
-            ),
-            axis=1
+        template_km = float(np.hypot(*np.diff(variant_offsets, axis=0).T).sum()) / 1000
+        scored.append((route, rows, {
+            'similarity': float(route.similarity),
+            'ride_minutes': ride_minutes(rows),
+            'minutes_per_km': ride_minutes(rows) / template_km if template_km > 0 else 0.0,
+            'coverage': coverage(rows),
+            'rotation': rotation,
+            'scale': scale,
+        }))
+    
+    # 騎行時間以模板長度正規化，避免分數一律偏好最小尺度
+    fastest = min(metrics['minutes_per_km'] for _, _, metrics in scored)
+    for _, _, metrics in scored:
+        time_score = fastest / metrics['minutes_per_km'] if metrics['minutes_per_km'] > 0 else 1.0
+        metrics['score'] = float(
+            ALTERNATIVE_WEIGHTS['similarity'] * metrics['similarity'] +
+            ALTERNATIVE_WEIGHTS['time'] * time_score +
+            ALTERNATIVE_WEIGHTS['coverage'] * metrics['coverage']
         )
-        
-        for idx in distances.nsmallest(10).index:
-            if idx not in used_indices:
-                selected_stations.append(candidates.loc[idx])
-                used_indices.add(idx)
-                break
     
-    route_df = pd.DataFrame(selected_stations)
+    # 先放入使用者設定的模板（第一個變體），其餘依分數挑選，略過與已選路線過於相似者
+    base = scored[0]
+    chosen, chosen_sets = [(base[0], base[2])], [set(base[1][1:])]
+    for route, rows, metrics in sorted(scored[1:], key=lambda item: item[2]['score'], reverse=True):
+        if len(chosen) >= k:
+            break
+        stations = set(rows[1:])
+        if any(len(stations & other) / max(len(stations | other), 1) > MAX_ALTERNATIVE_OVERLAP for other in chosen_sets):
+            continue
+        chosen.append((route, metrics))
+        chosen_sets.append(stations)
+    chosen.sort(key=lambda item: item[1]['score'], reverse=True)
+    
+    log(f"✅ 替代路線生成完成：{len(scored)} 個變體中選出 {len(chosen)} 條")
+    for rank, (route, metrics) in enumerate(chosen, 1):
+        log(f"   #{rank} 分數 {metrics['score']:.3f}｜相似度 {metrics['similarity']:.1%}｜"
+              f"騎行 {metrics['ride_minutes']:.1f} 分｜景點覆蓋 {metrics['coverage']:.0%}｜"
+              f"旋轉 {metrics['rotation']}°、尺度 ×{metrics['scale']}")
+    return chosen
+
+# ===================================================================
+# 完整路線規劃與快取
+# ===================================================================
+# 同一行程中重複的起點與圖形直接取用快取結果
+ROUTE_CACHE = RouteCache(max_size=128)
+
+def _plan_cache_key(cache, shape, start_station, config, snapshot, predictor, now):
+    version = snapshot.version
+    if predictor is not None:
+        # 預測結果隨時段改變，快取鍵加入目前的時段
+        version = f"{version}@{int(now // (predictor.bin_minutes * 60))}"
+    return cache.make_key(shape, start_station['sno'], config, version)
+
+def _with_live_counts(route, snapshot):
+    """
+    快取鍵不含可用數量，命中時以目前快照（依 stop.row）重建站點的可借/可還數量；
+    回傳新的 Route，不修改快取中共用的物件
+    """
+    stops = []
+    for stop in route:
+        stop = Stop.from_dict(stop.to_dict())
+        if stop.kind == 'ubike' and stop.row is not None:
+            stop.available_bikes = int(snapshot.rent[stop.row])
+            stop.available_spaces = int(snapshot.ret[stop.row])
+        stops.append(stop)
+    return Route(route.shape, stops, route.similarity)
+
+def _attach_attractions(route, attractions_df, config, attractions_xy):
+    """為路線上每個站點找附近景點"""
+    for idx, stop in enumerate(route, 1):
+        nearby = find_nearby_attractions(
+            stop.lat,
+            stop.lon,
+            attractions_df,
+            config.attraction_radius,
+            attractions_xy
+        )
+        if nearby:
+            stop.attractions = nearby
+            log(f"   站點 {idx}: 找到 {len(nearby)} 個景點")
+
+def plan_shape_route(youbike_df, attractions_df, start_station, config, cache=ROUTE_CACHE, snapshot=None, predictor=None,
+                     router=None, attractions_xy=None, generation=None):
+    """
+    規劃完整路線（圖形站點、附近景點、OSRM），依 (圖形, 起點, 配置, 快照版本) 快取。
+    router 預設為 get_osrm_route；attractions_xy 為 project_attractions 的結果（可重複使用）；
+    generation 為規劃所用可用數量快照的世代，快取已套用更新的快照時不寫入（見 RouteCache.put）。
+    """
+    if router is None:
+        router = get_osrm_route
+    if snapshot is None:
+        snapshot = StationSnapshot(youbike_df)
+    now = time.time()
+    key = _plan_cache_key(cache, config.target_shape, start_station, config, snapshot, predictor, now)
+    cached = cache.get(key)
+    if cached is not None:
+        log(f"\n♻️  使用快取路線: {config.target_shape} 形（起點 {start_station['sna']}）")
+        route, osrm_result = cached
+        return _with_live_counts(route, snapshot), osrm_result
+    
+    route = generate_shape_route(
+        youbike_df,
+        start_station,
+        config.target_shape,
+        config,
+        snapshot,
+        predictor,
+        now
+    )
+    
+    if route is None:
+        return None, None
+    
+    # 為每個站點找附近景點
+    log("\n🏛️  尋找附近景點...")
+    if attractions_xy is None:
+        attractions_xy = project_attractions(attractions_df)
+    _attach_attractions(route, attractions_df, config, attractions_xy)
+    
+    # 使用 OSRM 計算實際路線
+    osrm_result = router(route)
+    
+    result = (route, osrm_result)
+    if not osrm_result['success']:
+        # OSRM 失敗屬暫時性錯誤，不寫入快取，下次重新嘗試
+        return result
+    cache.put(key, result, route.station_ids(), config.min_available_bikes, config.min_available_spaces, generation)
+    return result
+
+def plan_shape_alternatives(youbike_df, attractions_df, start_station, config, k=3, cache=ROUTE_CACHE, snapshot=None,
+                            predictor=None, router=None, attractions_xy=None, generation=None):
+    """
+    規劃前 k 條替代路線（見 generate_shape_alternatives），回傳 [(Route, osrm_result, 指標 dict)]。
+    候選、指派與排序在各路線間共用，但每條入選路線仍各自呼叫一次 router（OSRM）：
+    公開 OSRM 服務以整條路線回傳幾何，替代路線共同的路段無法拆開重複使用。
+    整組結果以 (圖形/k, 起點, 配置, 快照版本) 快取；任一條 OSRM 失敗時不寫入快取。
+    """
+    if router is None:
+        router = get_osrm_route
+    if snapshot is None:
+        snapshot = StationSnapshot(youbike_df)
+    if attractions_xy is None:
+        attractions_xy = project_attractions(attractions_df)
+    now = time.time()
+    key = _plan_cache_key(cache, f"{config.target_shape}/top{k}", start_station, config, snapshot, predictor, now)
+    cached = cache.get(key)
+    if cached is not None:
+        log(f"\n♻️  使用快取替代路線: {config.target_shape} 形（起點 {start_station['sna']}）")
+        return [(_with_live_counts(route, snapshot), osrm_result, metrics) for route, osrm_result, metrics in cached]
     
-    # 計算相似度
-    actual_coords = route_df[['latitude', 'longitude']].values
-    similarity = shape_similarity(actual_coords, template)
+    alternatives = generate_shape_alternatives(
+        youbike_df, start_station, config.target_shape, config, k, snapshot, predictor, now, attractions_xy
+    )
     
-    print(f"✅ 路線生成完成")
-    print(f"   路線點數: {len(route_df)}")
-    print(f"   形狀相似度: {similarity:.2%}")
+    results = []
+    for rank, (route, metrics) in enumerate(alternatives, 1):
+        log(f"\n🏛️  尋找附近景點（路線 #{rank}）...")
+        _attach_attractions(route, attractions_df, config, attractions_xy)
+        results.append((route, router(route), metrics))
     
-    return route_df, similarity
+    if results and all(osrm_result['success'] for _, osrm_result, _ in results):
+        station_ids = sorted({sno for route, _, _ in results for sno in route.station_ids()})
+        cache.put(key, results, station_ids, config.min_available_bikes, config.min_available_spaces, generation)
+    return results
 
 # ===================================================================
 # OSRM 路線計算
 # ===================================================================
-def get_osrm_route(route_df):
+def get_osrm_route(route):
     """使用 OSRM 計算實際路線"""
-    print("\n🗺️  使用 OSRM 計算實際路線...")
+    log("\n🗺️  使用 OSRM 計算實際路線...")
     
-    coords_str = ";".join([f"{row['longitude']},{row['latitude']}" for _, row in route_df.iterrows()])
+    coords_str = ";".join([f"{stop.lon},{stop.lat}" for stop in route])
     osrm_url = f"http://router.project-osrm.org/route/v1/cycling/{coords_str}?overview=full&geometries=geojson"
     
     try:
@@ -431,10 +830,11 @@ def get_osrm_route(route_df):
                 route_coords = [(coord[1], coord[0]) for coord in route_geometry]
                 distance_km = route_data['distance'] / 1000
                 duration_min = route_data['duration'] / 60
+                record_osrm_legs(route.coords(), route_data['legs'])
                 
-                print(f"✅ OSRM 成功")
-                print(f"   實際距離: {distance_km:.2f} 公里")
-                print(f"   預估時間: {duration_min:.1f} 分鐘")
+                log(f"✅ OSRM 成功")
+                log(f"   實際距離: {distance_km:.2f} 公里")
+                log(f"   預估時間: {duration_min:.1f} 分鐘")
                 
                 return {
                     'coords': route_coords,
@@ -444,18 +844,20 @@ def get_osrm_route(route_df):
                 }
         return {'success': False}
     except Exception as e:
-        print(f"⚠️ OSRM 錯誤: {e}")
+        log(f"⚠️ OSRM 錯誤: {e}")
         return {'success': False}
 
 # ===================================================================
 # 地圖繪製
 # ===================================================================
-def create_shape_route_map(route_df, attractions_dict, osrm_result, config, similarity):
-    """創建圖形路線地圖"""
+def create_shape_route_map(route, osrm_result, config, output_html=None, open_browser=True):
+    """創建圖形路線地圖（output_html 預設為 config.output_html）"""
+    if output_html is None:
+        output_html = config.output_html
     
     # 地圖中心
-    center_lat = route_df['latitude'].mean()
-    center_lon = route_df['longitude'].mean()
+    center_lat = float(np.mean([stop.lat for stop in route]))
+    center_lon = float(np.mean([stop.lon for stop in route]))
     
     m = folium.Map(location=[center_lat, center_lon], zoom_start=14, tiles='OpenStreetMap')
     
@@ -465,34 +867,34 @@ def create_shape_route_map(route_df, attractions_dict, osrm_result, config, simi
         popup_text = f"距離: {osrm_result['distance']:.2f} km\n時間: {osrm_result['duration']:.1f} 分"
         line_color = 'darkblue'
     else:
-        route_coords = [(row['latitude'], row['longitude']) for _, row in route_df.iterrows()]
+        route_coords = route.coords()
         popup_text = f"路線圖形: {config.target_shape}"
         line_color = 'blue'
     
     folium.PolyLine(route_coords, color=line_color, weight=4, opacity=0.7, popup=popup_text).add_to(m)
     
     # 添加 YouBike 站點標記
-    for idx, (_, station) in enumerate(route_df.iterrows(), 1):
-        color = 'green' if station['available_rent_bikes'] >= 10 else 'orange'
+    for idx, station in enumerate(route, 1):
+        color = 'green' if station.available_bikes >= 10 else 'orange'
         
         popup_html = f"""
         <div style="width: 220px;">
-            <h4 style="color: {color};">🚲 站點 {idx}: {station['sna']}</h4>
+            <h4 style="color: {color};">🚲 站點 {idx}: {station.name}</h4>
             <hr>
-            <b>可借車輛：</b>{station['available_rent_bikes']} 輛<br>
-            <b>可還空位：</b>{station['available_return_bikes']} 位
+            <b>可借車輛：</b>{station.available_bikes} 輛<br>
+            <b>可還空位：</b>{station.available_spaces} 位
         """
         
         # 添加附近景點
-        if idx in attractions_dict:
+        if station.attractions:
             popup_html += "<hr><b>附近景點：</b><br>"
-            for attr in attractions_dict[idx][:3]:
+            for attr in station.attractions[:3]:
                 popup_html += f"📍 {attr['name']} ({attr['distance']:.0f}m)<br>"
         
         popup_html += "</div>"
         
         folium.Marker(
-            location=[station['latitude'], station['longitude']],
+            location=[station.lat, station.lon],
             popup=folium.Popup(popup_html, max_width=250),
             tooltip=f"站點 {idx}",
             icon=folium.Icon(color=color, icon='bicycle', prefix='fa')
@@ -500,7 +902,7 @@ def create_shape_route_map(route_df, attractions_dict, osrm_result, config, simi
         
         # 添加編號
         folium.Marker(
-            location=[station['latitude'], station['longitude']],
+            location=[station.lat, station.lon],
             icon=folium.DivIcon(html=f"""
                 <div style="font-size: 14px; font-weight: bold; color: white; 
                      background-color: {color}; border-radius: 50%; 
@@ -522,11 +924,13 @@ def create_shape_route_map(route_df, attractions_dict, osrm_result, config, simi
             <hr>
             <p><b>實際距離：</b>{osrm_result['distance']:.2f} 公里</p>
             <p><b>預估時間：</b>{osrm_result['duration']:.1f} 分鐘</p>
-            <p><b>停靠點數：</b>{len(route_df)} 個</p>
-            <p><b>形狀相似度：</b>{similarity:.1%}</p>
+            <p><b>停靠點數：</b>{len(route)} 個</p>
+            <p><b>形狀相似度：</b>{route.similarity:.1%}</p>
         </div>
         '''
     else:
+        # 無 OSRM 路線時以校正後的估計器推算距離與時間
+        est_distance, est_duration = default_estimator().estimate_route(route.coords(), config.cycling_speed)
         legend_html = f'''
         <div style="position: fixed; bottom: 50px; right: 50px; width: 250px; 
                     background-color: white; border:2px solid grey; z-index:9999; 
@@ -535,8 +939,10 @@ def create_shape_route_map(route_df, attractions_dict, osrm_result, config, simi
             <p><span style="color: blue;">━━</span> 規劃路線</p>
             <p><span style="color: green;">🚲</span> YouBike 站點</p>
             <hr>
-            <p><b>停靠點數：</b>{len(route_df)} 個</p>
-            <p><b>形狀相似度：</b>{similarity:.1%}</p>
+            <p><b>估計距離：</b>{est_distance:.2f} 公里</p>
+            <p><b>估計時間：</b>{est_duration:.1f} 分鐘</p>
+            <p><b>停靠點數：</b>{len(route)} 個</p>
+            <p><b>形狀相似度：</b>{route.similarity:.1%}</p>
         </div>
         '''
     
@@ -544,11 +950,12 @@ def create_shape_route_map(route_df, attractions_dict, osrm_result, config, simi
     
     plugins.Fullscreen(position='topright', title='全螢幕', title_cancel='退出全螢幕').add_to(m)
     
-    m.save(config.output_html)
-    print(f"\n✅ 地圖已生成：{config.output_html}")
+    m.save(output_html)
+    print(f"\n✅ 地圖已生成：{output_html}")
     
-    webbrowser.open('file://' + os.path.realpath(config.output_html))
-    print("🌐 已在瀏覽器開啟")
+    if open_browser:
+        webbrowser.open('file://' + os.path.realpath(output_html))
+        print("🌐 已在瀏覽器開啟")
 
 # ===================================================================
 # 主程式
@@ -562,6 +969,12 @@ def main():
     parser.add_argument('--max-time', type=int, default=20, help='每段最大騎行時間（分鐘）')
     parser.add_argument('--output', type=str, default='taipei_shape_route.html', help='輸出檔案')
     parser.add_argument('--auto-location', action='store_true', help='自動獲取當前位置')
+    parser.add_argument('--alternatives', type=int, default=1, metavar='K',
+                        help='一次產生前 K 條替代路線（依相似度、騎行時間與景點覆蓋排序）')
+    parser.add_argument('--predictor', type=str, default=None, metavar='MODEL',
+                        help='以抵達時可用數量預測模型篩選站點（availability_predictor.py 訓練的 .npz）')
+    parser.add_argument('--profile', type=str, default=None, metavar='PREFIX',
+                        help='輸出效能分析報告（PREFIX.prof / .txt / .collapsed）')
     
     args = parser.parse_args()
     
@@ -583,6 +996,13 @@ def main():
         # 使用預設值（臺大新體育館附近）
         config.user_location = {'lat': 25.021777051200228, 'lon': 121.5354050968437}
     
+    predictor = AvailabilityPredictor.load(args.predictor) if args.predictor else None
+    
+    with maybe_profile(args.profile):
+        run_shape_route(config, predictor, args.alternatives)
+
+def run_shape_route(config, predictor=None, alternatives=1):
+    """執行完整流程：抓取資料、規劃路線、繪製地圖、輸出摘要（alternatives > 1 時輸出前 K 條替代路線）"""
     print("=" * 70)
     print(f"  台北市圖形路線規劃系統 - {config.target_shape} 形路線")
     print("=" * 70)
@@ -601,59 +1021,52 @@ def main():
             config.min_available_bikes
         )
         
-        # 3. 生成圖形路線
-        route_df, similarity = generate_shape_route(
+        # 只淘汰可用車輛/空位低於門檻的快取路線
+        ROUTE_CACHE.refresh(youbike_df)
+        snapshot = StationSnapshot(youbike_df)
+        
+        if alternatives > 1:
+            run_alternatives(youbike_df, attractions_df, start_station, config, snapshot, predictor, alternatives)
+            return
+        
+        # 3~5. 生成圖形路線、尋找附近景點、計算 OSRM 路線
+        route, osrm_result = plan_shape_route(
             youbike_df,
+            attractions_df,
             start_station,
-            config.target_shape,
-            config
+            config,
+            snapshot=snapshot,
+            predictor=predictor
         )
         
-        if route_df is None:
+        if route is None:
             print("❌ 路線生成失敗")
             return
         
-        # 4. 為每個站點找附近景點
-        print("\n🏛️  尋找附近景點...")
-        attractions_dict = {}
-        for idx, (_, station) in enumerate(route_df.iterrows(), 1):
-            nearby = find_nearby_attractions(
-                station['latitude'],
-                station['longitude'],
-                attractions_df,
-                config.attraction_radius
-            )
-            if nearby:
-                attractions_dict[idx] = nearby
-                print(f"   站點 {idx}: 找到 {len(nearby)} 個景點")
-        
-        # 5. 使用 OSRM 計算實際路線
-        osrm_result = get_osrm_route(route_df)
-        
         # 6. 繪製地圖
         print()
-        create_shape_route_map(route_df, attractions_dict, osrm_result, config, similarity)
+        create_shape_route_map(route, osrm_result, config)
         
         # 7. 輸出路線摘要
         print("\n" + "=" * 70)
         print("🗺️  路線摘要")
         print("=" * 70)
-        for idx, (_, station) in enumerate(route_df.iterrows(), 1):
+        for idx, station in enumerate(route, 1):
             ride_time = calculate_ride_time(
                 haversine_distance(
                     start_station['latitude'], start_station['longitude'],
-                    station['latitude'], station['longitude']
+                    station.lat, station.lon
                 )
             )
-            print(f"{idx}. 🚲 {station['sna']} ({station['available_rent_bikes']}輛) - {ride_time:.1f}分鐘")
-            if idx in attractions_dict and attractions_dict[idx]:
-                for attr in attractions_dict[idx][:2]:
+            print(f"{idx}. 🚲 {station.name} ({station.available_bikes}輛) - {ride_time:.1f}分鐘")
+            if station.attractions:
+                for attr in station.attractions[:2]:
                     print(f"     📍 {attr['name']} ({attr['distance']:.0f}m)")
         print("=" * 70)
         
         print("\n🎉 完成！")
         print(f"💡 圖形: {config.target_shape}")
-        print(f"💡 相似度: {similarity:.1%}")
+        print(f"💡 相似度: {route.similarity:.1%}")
         if osrm_result and osrm_result['success']:
             print(f"💡 總距離: {osrm_result['distance']:.2f} 公里")
             print(f"💡 預估時間: {osrm_result['duration']:.1f} 分鐘")
@@ -663,5 +1076,39 @@ def main():
         import traceback
         traceback.print_exc()
 
+def run_alternatives(youbike_df, attractions_df, start_station, config, snapshot, predictor, k):
+    """規劃前 k 條替代路線，各自輸出地圖（只開啟最佳路線），並列出排名摘要"""
+    results = plan_shape_alternatives(
+        youbike_df,
+        attractions_df,
+        start_station,
+        config,
+        k,
+        snapshot=snapshot,
+        predictor=predictor
+    )
+    if not results:
+        print("❌ 路線生成失敗")
+        return
+    
+    base, ext = os.path.splitext(config.output_html)
+    print()
+    for rank, (route, osrm_result, _) in enumerate(results, 1):
+        output_html = config.output_html if rank == 1 else f"{base}_alt{rank}{ext}"
+        create_shape_route_map(route, osrm_result, config, output_html, open_browser=(rank == 1))
+    
+    print("\n" + "=" * 70)
+    print(f"🗺️  替代路線排名（{config.target_shape} 形）")
+    print("=" * 70)
+    for rank, (route, osrm_result, metrics) in enumerate(results, 1):
+        print(f"#{rank} 分數 {metrics['score']:.3f}｜相似度 {route.similarity:.1%}｜"
+              f"景點覆蓋 {metrics['coverage']:.0%}｜旋轉 {metrics['rotation']}°、尺度 ×{metrics['scale']}")
+        if osrm_result and osrm_result['success']:
+            print(f"    {len(route)} 站｜{osrm_result['distance']:.2f} 公里｜{osrm_result['duration']:.1f} 分鐘")
+        else:
+            print(f"    {len(route)} 站｜估計騎行 {metrics['ride_minutes']:.1f} 分鐘")
+        print("    " + " → ".join(stop.name for stop in route))
+    print("=" * 70)
+
 if __name__ == "__main__":
     main()
@@ -1,5 +1,6 @@
 # utils.py
 from math import radians, sin, cos, sqrt, atan2
+import numpy as np
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     R = 6371.0  # Earth radius in kilometers
@@ -10,6 +11,18 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * atan2(sqrt(a), sqrt(1 - a))
     return R * c
 
+def haversine_array(lat, lon, lats, lons):
+    """
+    Vectorized haversine distance (km) from one point to arrays of points.
+    """
+    R = 6371.0
+    lat_rad, lon_rad = np.radians(lat), np.radians(lon)
+    lats_rad, lons_rad = np.radians(lats), np.radians(lons)
+    dlat = lats_rad - lat_rad
+    dlon = lons_rad - lon_rad
+    a = np.sin(dlat / 2)**2 + np.cos(lat_rad) * np.cos(lats_rad) * np.sin(dlon / 2)**2
+    return 2 * R * np.arcsin(np.sqrt(a))
+
 def calculate_biking_time(distance_km, speed_kmh):
     """Calculates biking time in minutes."""
     return (distance_km / speed_kmh) * 60